@@ -11,6 +11,7 @@
 from .audio import Audio
 from .event import Event
 from .exceptions import AmcrestError, CommError, LoginError  # noqa: F401
+from .fleet import CameraFleet, FleetResult  # noqa: F401
 from .log import Log
 from .media import Media
 from .motion_detection import MotionDetection
@@ -42,6 +43,9 @@ class AmcrestCamera:
         ssl_verify=True,
         retries_connection=None,
         timeout_protocol=None,
+        pool_maxsize=None,
+        async_limits=None,
+        config_cache_ttl=None,
     ) -> None:
         super().__init__()
         self.camera = ApiWrapper(
@@ -54,8 +58,31 @@ class AmcrestCamera:
             ssl_verify=ssl_verify,
             retries_connection=retries_connection,
             timeout_protocol=timeout_protocol,
+            pool_maxsize=pool_maxsize,
+            async_limits=async_limits,
+            config_cache_ttl=config_cache_ttl,
         )
 
+    def close(self) -> None:
+        """Close all connections to the camera."""
+        self.camera.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    async def async_close(self) -> None:
+        """Close all async connections to the camera."""
+        await self.camera.async_close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.async_close()
+
 
 # pylint: disable=too-many-ancestors
 class ApiWrapper(
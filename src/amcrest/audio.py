@@ -10,12 +10,12 @@
 # vim:sw=4:ts=4:et
 import logging
 import shutil
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 from urllib3.exceptions import HTTPError
 from . import utils
 from .exceptions import CommError
-from .http import Http
+from .http import Http, TimeoutT
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -91,7 +91,7 @@ class Audio(Http):
 
         """
         if httptype is None or channel is None:
-            raise RuntimeError("Requires htttype and channel")
+            raise RuntimeError("Requires httptype and channel")
         if encode is None:
             raise RuntimeError("Requires encode")
         if path_file is None:
@@ -129,8 +129,8 @@ class Audio(Http):
             channel - integer
             path_file - path to output file
         """
-        if httptype is None and channel is None:
-            raise RuntimeError("Requires htttype and channel")
+        if httptype is None or channel is None:
+            raise RuntimeError("Requires httptype and channel")
 
         ret = self.command(
             f"audio.cgi?action=getAudio&httptype={httptype}&channel={channel}",
@@ -151,6 +151,29 @@ class Audio(Http):
 
         return ret.raw
 
+    async def async_audio_stream_capture(
+        self,
+        httptype: Optional[str] = None,
+        channel: Optional[int] = None,
+        *,
+        chunk_size: Optional[int] = None,
+        timeout: TimeoutT = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield the audio stream in chunks as they are received, see
+        audio_stream_capture for the params. The next chunk is only read
+        once the previous one was consumed.
+        """
+        if httptype is None or channel is None:
+            raise RuntimeError("Requires httptype and channel")
+
+        async with self.async_stream_command(
+            f"audio.cgi?action=getAudio&httptype={httptype}&channel={channel}",
+            timeout_cmd=timeout,
+        ) as ret:
+            async for chunk in ret.aiter_bytes(chunk_size):
+                yield chunk
+
     @property
     def audio_enabled(self) -> bool:
         """Return if any audio stream enabled."""
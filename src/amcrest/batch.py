@@ -0,0 +1,189 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 2 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# vim:sw=4:ts=4:et
+import logging
+from typing import TYPE_CHECKING, Dict, List, Mapping, Optional, Union
+
+from .config import MAX_SETCONFIG_URL_LENGTH
+from .exceptions import CommError
+
+if TYPE_CHECKING:
+    from .http import Http
+
+_LOGGER = logging.getLogger(__name__)
+_SET_CONFIG = "configManager.cgi?action=setConfig"
+
+ValueT = Union[str, int, bool]
+
+
+def _to_str(value: ValueT) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+class ConfigBatch:
+    """
+    Collect setConfig updates and send them in as few requests as possible.
+
+    Example:
+        with camera.config_batch() as batch:
+            batch.set_motion_detection(True)
+            batch.set_record_mode(1)
+            batch.set_ntp_config("NTP.Enable=true&NTP.Port=123")
+        batch.results
+        {'MotionDetect[0].Enable': True, 'RecordMode[0].Mode': True, ...}
+
+    Updates are merged into setConfig requests no longer than
+    max_url_length. The camera answers OK or Error for a whole request, so
+    the result of each key is the result of the request it was sent in.
+    """
+
+    def __init__(
+        self, http: "Http", max_url_length: Optional[int] = None
+    ) -> None:
+        self._http = http
+        self._max_url_length = max_url_length or MAX_SETCONFIG_URL_LENGTH
+        self._updates: Dict[str, str] = {}
+        self.results: Dict[str, bool] = {}
+
+    def __len__(self) -> int:
+        return len(self._updates)
+
+    def set(self, key: str, value: ValueT) -> None:
+        """Set a config parameter, such as 'MotionDetect[0].Enable'."""
+        self._updates[key] = _to_str(value)
+
+    def update(self, options: Union[str, Mapping[str, ValueT]]) -> None:
+        """
+        Set many config parameters.
+
+        options is either a mapping or a string with the format
+        <paramName>=<paramValue>[&<paramName>=<paramValue>...]
+        """
+        if isinstance(options, str):
+            for option in options.split("&"):
+                if option:
+                    key, _, str_value = option.partition("=")
+                    self._updates[key] = str_value
+        else:
+            for key, value in options.items():
+                self.set(key, value)
+
+    def set_motion_detection(self, opt: bool, *, channel: int = 0) -> None:
+        self.set(f"MotionDetect[{channel}].Enable", opt)
+
+    def set_motion_recording(self, opt: bool, *, channel: int = 0) -> None:
+        self.set(f"MotionDetect[{channel}].EventHandler.RecordEnable", opt)
+
+    def set_video_in_option(
+        self, param: str, value: str, *, profile: str = "Day", channel: int = 0
+    ) -> None:
+        if profile == "Day":
+            field = param
+        else:
+            field = f"{profile}Options.{param}"
+        self.set(f"VideoInOptions[{channel}].{field}", value)
+
+    def set_day_night_color(self, value: int, channel: int = 0) -> None:
+        self.set_video_in_option("DayNightColor", str(value), channel=channel)
+
+    def set_smart_ir(self, value: bool, channel: int = 0) -> None:
+        # See Video.set_smart_ir about the inverted value.
+        str_value = "false" if value else "true"
+        self.set_video_in_option("InfraRed", str_value, channel=channel)
+
+    def set_privacy(self, mode: bool) -> None:
+        self.set("LeLensMask[0].Enable", mode)
+
+    def set_record_mode(self, record_opt: int, *, channel: int = 0) -> None:
+        self.set(f"RecordMode[{channel}].Mode", record_opt)
+
+    def set_record_config(self, rec_opt: str) -> None:
+        self.update(rec_opt)
+
+    def set_ntp_config(self, ntp_opt: str) -> None:
+        self.update(ntp_opt)
+
+    def commands(self) -> List[List[str]]:
+        """Return the keys to send in each setConfig request."""
+        base_length = len(self._http.get_base_url()) + len(_SET_CONFIG)
+        chunks: List[List[str]] = []
+        length = 0
+        for key, value in self._updates.items():
+            param_length = len(key) + len(value) + 2
+            if not chunks or length + param_length > self._max_url_length:
+                chunks.append([])
+                length = base_length
+            chunks[-1].append(key)
+            length += param_length
+        return chunks
+
+    def _command(self, keys: List[str]) -> str:
+        params = "".join(f"&{key}={self._updates[key]}" for key in keys)
+        return f"{_SET_CONFIG}{params}"
+
+    def _set_results(self, keys: List[str], success: bool) -> None:
+        for key in keys:
+            self.results[key] = success
+
+    def flush(self) -> Dict[str, bool]:
+        """Send the pending updates, return if each key was accepted."""
+        self.results = {}
+        for keys in self.commands():
+            try:
+                ret = self._http.command(self._command(keys))
+            except CommError as error:
+                content = repr(error)
+            else:
+                content = ret.content.decode()
+                if "ok" in content.lower():
+                    self._set_results(keys, True)
+                    continue
+            _LOGGER.debug(
+                "%s setConfig of %s failed: %s", self._http, keys, content
+            )
+            self._set_results(keys, False)
+        self._updates.clear()
+        return self.results
+
+    async def async_flush(self) -> Dict[str, bool]:
+        """Send the pending updates, return if each key was accepted."""
+        self.results = {}
+        for keys in self.commands():
+            try:
+                ret = await self._http.async_command(self._command(keys))
+            except CommError as error:
+                content = repr(error)
+            else:
+                content = ret.content.decode()
+                if "ok" in content.lower():
+                    self._set_results(keys, True)
+                    continue
+            _LOGGER.debug(
+                "%s setConfig of %s failed: %s", self._http, keys, content
+            )
+            self._set_results(keys, False)
+        self._updates.clear()
+        return self.results
+
+    def __enter__(self) -> "ConfigBatch":
+        return self
+
+    def __exit__(self, exc_type, *exc_info) -> None:
+        if exc_type is None:
+            self.flush()
+
+    async def __aenter__(self) -> "ConfigBatch":
+        return self
+
+    async def __aexit__(self, exc_type, *exc_info) -> None:
+        if exc_type is None:
+            await self.async_flush()
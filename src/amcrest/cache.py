@@ -0,0 +1,200 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 2 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# vim:sw=4:ts=4:et
+import asyncio
+import re
+import threading
+import time
+from functools import partial
+from typing import (
+    Any,
+    Callable,
+    Coroutine,
+    Dict,
+    Iterable,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+_SET_CONFIG = "configManager.cgi?action=setConfig"
+_REG_CONFIG_NAME = re.compile(r"[.\[=]")
+
+CacheTtlT = Union[float, Mapping[str, float]]
+
+
+def set_config_names(cmd: str) -> Set[str]:
+    """Return the config names changed by a setConfig command."""
+    if not cmd.startswith(_SET_CONFIG):
+        return set()
+    params = cmd.split("&")[1:]
+    return {_REG_CONFIG_NAME.split(param, 1)[0] for param in params if param}
+
+
+class _Flight:
+    """A getConfig request other threads can wait for."""
+
+    def __init__(self) -> None:
+        self._done = threading.Event()
+        self._value: Optional[str] = None
+        self._error: Optional[BaseException] = None
+
+    def set_result(self, value: str) -> None:
+        self._value = value
+        self._done.set()
+
+    def set_error(self, error: BaseException) -> None:
+        self._error = error
+        self._done.set()
+
+    def wait(self) -> str:
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        assert self._value is not None
+        return self._value
+
+
+class ConfigCache:
+    """
+    Cache of getConfig responses.
+
+    ttl is either the number of seconds every config is kept, or a mapping
+    of config name to seconds, in which case only those configs are cached.
+
+    Concurrent reads of a config that is not cached share one request, and
+    entries are dropped when a setConfig of the same name is sent.
+    """
+
+    def __init__(self, ttl: CacheTtlT) -> None:
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, str]] = {}
+        self._generations: Dict[str, int] = {}
+        self._flights: Dict[str, _Flight] = {}
+        # In-flight async fetches and their loop, Task.get_loop() needs
+        # Python 3.8.
+        self._tasks: Dict[
+            str, Tuple[asyncio.AbstractEventLoop, "asyncio.Task[str]"]
+        ] = {}
+
+    def ttl(self, name: str) -> float:
+        if isinstance(self._ttl, Mapping):
+            return self._ttl.get(name, 0)
+        return self._ttl
+
+    def _lookup(self, name: str) -> Optional[str]:
+        entry = self._entries.get(name)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._entries[name]
+            return None
+        return value
+
+    def _store(self, name: str, generation: int, value: str) -> None:
+        # Drop responses of requests that were sent before an invalidation.
+        if self._generations.get(name, 0) == generation:
+            self._entries[name] = (time.monotonic() + self.ttl(name), value)
+
+    def peek(self, name: str) -> Tuple[Optional[str], int]:
+        """Return the cached value of a config and its generation.
+
+        The generation has to be given back to put() so a response to a
+        request sent before an invalidation is not cached.
+        """
+        with self._lock:
+            return self._lookup(name), self._generations.get(name, 0)
+
+    def put(self, name: str, generation: int, value: str) -> None:
+        if self.ttl(name) > 0:
+            with self._lock:
+                self._store(name, generation, value)
+
+    def get(self, name: str, fetch: Callable[[str], str]) -> str:
+        if self.ttl(name) <= 0:
+            return fetch(name)
+        with self._lock:
+            value = self._lookup(name)
+            if value is not None:
+                return value
+            flight = self._flights.get(name)
+            if flight is not None:
+                leader = False
+            else:
+                leader = True
+                flight = self._flights[name] = _Flight()
+                generation = self._generations.get(name, 0)
+        if not leader:
+            return flight.wait()
+
+        try:
+            value = fetch(name)
+        except BaseException as error:
+            flight.set_error(error)
+            raise
+        finally:
+            with self._lock:
+                if self._flights.get(name) is flight:
+                    del self._flights[name]
+        with self._lock:
+            self._store(name, generation, value)
+        flight.set_result(value)
+        return value
+
+    async def async_get(
+        self, name: str, fetch: Callable[[str], Coroutine[Any, Any, str]]
+    ) -> str:
+        if self.ttl(name) <= 0:
+            return await fetch(name)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            value = self._lookup(name)
+            if value is not None:
+                return value
+            in_flight = self._tasks.get(name)
+            if in_flight is not None and in_flight[0] is loop:
+                task = in_flight[1]
+            else:
+                task = loop.create_task(fetch(name))
+                self._tasks[name] = (loop, task)
+                task.add_done_callback(
+                    partial(
+                        self._task_done, name, self._generations.get(name, 0)
+                    )
+                )
+        # A cancelled reader must not cancel the request of the others.
+        return await asyncio.shield(task)
+
+    def _task_done(
+        self, name: str, generation: int, task: "asyncio.Task[str]"
+    ) -> None:
+        with self._lock:
+            in_flight = self._tasks.get(name)
+            if in_flight is not None and in_flight[1] is task:
+                del self._tasks[name]
+            if not task.cancelled() and task.exception() is None:
+                self._store(name, generation, task.result())
+
+    def invalidate(self, names: Iterable[str]) -> None:
+        with self._lock:
+            for name in names:
+                self._entries.pop(name, None)
+                self._flights.pop(name, None)
+                self._tasks.pop(name, None)
+                self._generations[name] = self._generations.get(name, 0) + 1
+
+    def clear(self) -> None:
+        self.invalidate(
+            set(self._entries) | set(self._flights) | set(self._tasks)
+        )
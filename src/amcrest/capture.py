@@ -0,0 +1,271 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 2 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# vim:sw=4:ts=4:et
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .exceptions import CommError, ReadTimeoutError
+from .http import TimeoutT
+
+if TYPE_CHECKING:
+    from .snapshot import Snapshot
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Frame(NamedTuple):
+    # Number of the tick of the schedule the frame was taken at.
+    tick: int
+    # time.time() when the snapshot was requested.
+    time: float
+    # Seconds the camera took to send the snapshot.
+    latency: float
+    data: bytes
+
+
+class CaptureStats(NamedTuple):
+    frames: int
+    # Ticks of the schedule missed because capturing fell behind.
+    skipped: int
+    # Frames dropped because the queue they were handed to was full.
+    dropped: int
+    failed: int
+    seconds: float
+    latency: float
+    max_latency: float
+
+    @property
+    def fps(self) -> float:
+        """Return the frames captured per second."""
+        return self.frames / self.seconds if self.seconds > 0 else 0.0
+
+
+FrameHandlerT = Callable[[Frame], Any]
+
+
+class SnapshotCapture:
+    """
+    Take snapshots of a camera at a fixed rate, reusing the connections of
+    the camera instead of opening one per frame.
+
+        capture = camera.capture(fps=5)
+        stats = capture.run(handle_frame, duration=60)
+
+    Frames are taken at start + n / fps. When a snapshot or its handler
+    takes longer than that, the missed ticks are skipped instead of being
+    caught up with a burst of requests.
+    """
+
+    def __init__(
+        self,
+        camera: "Snapshot",
+        fps: float,
+        *,
+        channel: Optional[int] = None,
+        timeout: TimeoutT = None,
+    ) -> None:
+        if fps <= 0:
+            raise ValueError(f"fps must be positive, not {fps}")
+        self._camera = camera
+        self.period = 1 / fps
+        self.channel = channel
+        self.timeout = timeout
+        self._stop = threading.Event()
+        # Event of the running async_run(), set by stop() from any thread.
+        self._async_stop: Optional[
+            Tuple[asyncio.AbstractEventLoop, asyncio.Event]
+        ] = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self._stop.clear()
+        self._started = time.monotonic()
+        self._stopped: Optional[float] = None
+        self._frames = 0
+        self._skipped = 0
+        self._dropped = 0
+        self._failed = 0
+        self._latency = 0.0
+        self._max_latency = 0.0
+
+    def stop(self) -> None:
+        """Stop a running capture, from any thread."""
+        self._stop.set()
+        async_stop = self._async_stop
+        if async_stop is not None:
+            loop, event = async_stop
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # The loop was closed, so the capture is not running.
+                pass
+
+    @property
+    def stats(self) -> CaptureStats:
+        """Return the statistics of the current or last capture."""
+        stopped = self._stopped
+        if stopped is None:
+            stopped = time.monotonic()
+        return CaptureStats(
+            frames=self._frames,
+            skipped=self._skipped,
+            dropped=self._dropped,
+            failed=self._failed,
+            seconds=stopped - self._started,
+            latency=self._latency / self._frames if self._frames else 0.0,
+            max_latency=self._max_latency,
+        )
+
+    def _done(self, frames: Optional[int], duration: Optional[float]) -> bool:
+        if self._stop.is_set():
+            return True
+        if frames is not None and self._frames >= frames:
+            return True
+        return (
+            duration is not None
+            and time.monotonic() - self._started >= duration
+        )
+
+    def _add(self, index: int, requested: float, data: bytes) -> Frame:
+        latency = time.monotonic() - requested
+        self._frames += 1
+        self._latency += latency
+        self._max_latency = max(self._max_latency, latency)
+        return Frame(
+            tick=index,
+            time=time.time() - latency,
+            latency=latency,
+            data=data,
+        )
+
+    def _next_tick(self, index: int) -> Tuple[int, float]:
+        """
+        Return the tick after index, skipping the ticks already past, and
+        how long to wait for it.
+        """
+        elapsed = time.monotonic() - self._started
+        late = int(elapsed / self.period)
+        if late > index + 1:
+            self._skipped += late - index - 1
+            _LOGGER.debug(
+                "%s Capture behind, skipped %i frames",
+                self._camera,
+                late - index - 1,
+            )
+            index = late - 1
+        index += 1
+        return index, max(0.0, index * self.period - elapsed)
+
+    def run(
+        self,
+        handler: FrameHandlerT,
+        *,
+        frames: Optional[int] = None,
+        duration: Optional[float] = None,
+    ) -> CaptureStats:
+        """
+        Hand snapshots to handler until frames were captured, duration
+        seconds elapsed or stop() was called. Return the statistics.
+
+        handler runs in the capturing thread: the time it takes counts
+        against the schedule.
+        """
+        self._reset()
+        index = 0
+        try:
+            while not self._done(frames, duration):
+                requested = time.monotonic()
+                try:
+                    data = self._camera.snapshot(
+                        channel=self.channel,
+                        timeout=self.timeout,
+                        stream=False,
+                    )
+                except (CommError, ReadTimeoutError) as error:
+                    self._failed += 1
+                    _LOGGER.debug("%s Capture failed: %r", self._camera, error)
+                else:
+                    handler(self._add(index, requested, data))
+                if self._done(frames, duration):
+                    break
+                index, delay = self._next_tick(index)
+                if delay and self._stop.wait(delay):
+                    break
+        finally:
+            self._stopped = time.monotonic()
+        return self.stats
+
+    async def async_run(
+        self,
+        handler: Union[FrameHandlerT, "asyncio.Queue[Frame]"],
+        *,
+        frames: Optional[int] = None,
+        duration: Optional[float] = None,
+    ) -> CaptureStats:
+        """
+        Like run(), handler may be a coroutine function, or an asyncio.Queue
+        to put the frames in. When the queue is full its oldest frame is
+        dropped, so consumers always get the latest frames.
+        """
+        self._reset()
+        stopped = asyncio.Event()
+        self._async_stop = (asyncio.get_running_loop(), stopped)
+        index = 0
+        try:
+            while not self._done(frames, duration):
+                requested = time.monotonic()
+                try:
+                    data = await self._camera.async_snapshot(
+                        channel=self.channel, timeout=self.timeout
+                    )
+                except (CommError, ReadTimeoutError) as error:
+                    self._failed += 1
+                    _LOGGER.debug("%s Capture failed: %r", self._camera, error)
+                else:
+                    frame = self._add(index, requested, data)
+                    if isinstance(handler, asyncio.Queue):
+                        self._put(handler, frame)
+                    else:
+                        result = handler(frame)
+                        if inspect.isawaitable(result):
+                            await result
+                if self._done(frames, duration):
+                    break
+                index, delay = self._next_tick(index)
+                if delay:
+                    try:
+                        await asyncio.wait_for(stopped.wait(), delay)
+                    except asyncio.TimeoutError:
+                        continue
+                    break
+        finally:
+            self._async_stop = None
+            self._stopped = time.monotonic()
+        return self.stats
+
+    def _put(self, frames: "asyncio.Queue[Frame]", frame: Frame) -> None:
+        try:
+            frames.put_nowait(frame)
+        except asyncio.QueueFull:
+            frames.get_nowait()
+            self._dropped += 1
+            frames.put_nowait(frame)
@@ -22,3 +22,46 @@ KEEPALIVE_COUNT = 5
 # Retries - maximum number of retries each connection should attempt
 # Default value from requests library is 3
 MAX_RETRY_HTTP_CONNECTION = 3
+
+# Maximum number of connections to keep open in the connection pool of each
+# camera. Extra connections (e.g. long lived streams) are still allowed but
+# are discarded instead of being reused once they are released.
+HTTP_POOL_MAXSIZE = 10
+
+# Longest URL to send when several setConfig updates are merged in one
+# request. Some firmwares reject or truncate longer request lines.
+MAX_SETCONFIG_URL_LENGTH = 1024
+
+# Seconds the event hub waits before opening the event stream again after
+# it failed, and default number of events queued for each subscriber.
+EVENT_HUB_RETRY_DELAY = 5
+EVENT_QUEUE_MAXSIZE = 100
+
+# Default number of cameras a CameraFleet runs a command on at the same time.
+FLEET_MAX_WORKERS = 16
+
+# Seconds to wait for a port of each address when scanning a subnet, and
+# number of addresses checked at the same time. If devices are not found,
+# try increasing the timeout.
+SCAN_TIMEOUT = 0.2
+SCAN_CONCURRENCY = 256
+
+# Size of the chunks written to disk when downloading recorded files.
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Default number of recorded files exported at the same time. Cameras serve
+# few downloads at once, more only slow each of them down.
+EXPORT_MAX_WORKERS = 4
+
+# Adaptive page size of find_files and log_find: pages grow while they are
+# answered in less than half this many seconds and shrink when they take
+# longer, but never below the minimum page size.
+PAGE_TARGET_SECONDS = 2.0
+PAGE_MIN_COUNT = 10
+
+# Searches of recorded files run at the same time by a sharded find_files.
+# Cameras only allow a few mediaFileFind factories at once.
+MAX_MEDIA_FACTORIES = 2
+
+# Bytes buffered before writing to the segment files of a recorded stream.
+RECORD_BUFFER_SIZE = 1024 * 1024
@@ -14,51 +14,66 @@ import re
 from typing import (
     Any,
     AsyncIterator,
-    AsyncIterable,
     Dict,
     Iterator,
-    Iterable,
     List,
     Optional,
     Tuple,
 )
 
+import requests
 from requests import RequestException
 from urllib3.exceptions import HTTPError
 
+from .config import EVENT_QUEUE_MAXSIZE
+from .event_hub import (
+    AsyncEventSubscription,
+    EventHub,
+    EventSubscription,
+    PolicyT,
+)
 from .exceptions import CommError, ReadTimeoutError
 from .http import Http, TimeoutT
+from .multipart import StreamBuffer, iter_chunks
 from .utils import pretty
 
 _LOGGER = logging.getLogger(__name__)
 _REG_PARSE_KEY_VALUE = re.compile(r"(?P<key>.+?)(?:=)(?P<value>.+?)(?:;|$)")
 
 
-def _event_lines(ret: Iterable[str]) -> Iterator[str]:
-    line = []
-    for char in ret:
-        line.append(char)
-        if line[-2:] == ["\r", "\n"]:
-            yield "".join(line).strip()
-            line.clear()
-
+class _EventParser:
+    """
+    Parser of the eventManager.cgi?action=attach multipart stream.
 
-async def _async_event_lines(ret: AsyncIterable[str]) -> AsyncIterator[str]:
-    line = []
-    async for char in ret:
-        line.append(char)
-        if line[-2:] == ["\r", "\n"]:
-            yield "".join(line).strip()
-            line.clear()
+    Feed it the bytes of the stream as they come and it returns the event
+    info of the parts that are complete.
+    """
 
+    def __init__(self) -> None:
+        self._buffer = StreamBuffer()
+        self._size: Optional[int] = None
 
-async def _async_event_info(ret: AsyncIterable[str], length: int) -> str:
-    line = []
-    async for char in ret:
-        line.append(char)
-        if len(line) == length:
-            return "".join(line)
-    raise CommError()
+    def feed(self, data: bytes) -> List[str]:
+        self._buffer.feed(data)
+        events = []
+        while True:
+            if self._size is not None:
+                info = self._buffer.read(self._size)
+                if info is None:
+                    break
+                self._size = None
+                events.append(info.decode("utf-8", "replace"))
+                continue
+            line = self._buffer.readline()
+            if line is None:
+                break
+            line = line.strip()
+            if line.lower().startswith(b"content-length:"):
+                # There tends to be a leading \r\n, so add 2 to the length.
+                # If this is not present, there is a trailing \r\n\r\n at
+                # the end that will just be stripped out
+                self._size = int(line.split(b":")[1]) + 2
+        return events
 
 
 class Event(Http):
@@ -285,6 +300,21 @@ class Event(Http):
         SmartMotionHuman: human detection event
         SmartMotionVehicle: vehicle detection event
         """
+        ret = self._attach(
+            eventcodes, retries=retries, timeout_cmd=timeout_cmd
+        )
+        try:
+            yield from self._iter_event_info(ret)
+        finally:
+            ret.close()
+
+    def _attach(
+        self,
+        eventcodes: str,
+        *,
+        retries: Optional[int] = None,
+        timeout_cmd: TimeoutT = None,
+    ) -> requests.Response:
         urllib3_logger = logging.getLogger("urllib3.connectionpool")
         if not any(
             isinstance(x, NoHeaderErrorFilter) for x in urllib3_logger.filters
@@ -299,35 +329,21 @@ class Event(Http):
             else:
                 timeout_cmd = self._timeout_default, None
 
-        ret = self.command(
+        return self.command(
             f"eventManager.cgi?action=attach&codes=[{eventcodes}]",
             retries=retries,
             timeout_cmd=timeout_cmd,
             stream=True,
         )
-        if ret.encoding is None:
-            ret.encoding = "utf-8"  # type: ignore[unreachable]
 
+    def _iter_event_info(self, ret: requests.Response) -> Iterator[str]:
+        parser = _EventParser()
         try:
-            for line in _event_lines(ret.iter_content(decode_unicode=True)):
-                if line.lower().startswith("content-length:"):
-                    # There tends to be a leading \r\n, so add 2 to the length.
-                    # If this is not present, there is a trailing \r\n\r\n at
-                    # the end that will just be stripped out
-                    chunk_size = int(line.split(":")[1]) + 2
-                    try:
-                        yield next(
-                            ret.iter_content(
-                                chunk_size=chunk_size, decode_unicode=True
-                            )
-                        )
-                    except StopIteration:
-                        return
+            for chunk in iter_chunks(ret):
+                yield from parser.feed(chunk)
         except (RequestException, HTTPError) as error:
             _LOGGER.debug("%s Error during event streaming: %r", self, error)
             raise CommError(error) from error
-        finally:
-            ret.close()
 
     async def async_event_stream(
         self, eventcodes: str, *, timeout_cmd: TimeoutT = None
@@ -339,15 +355,10 @@ class Event(Http):
                     f"eventManager.cgi?action=attach&codes=[{eventcodes}]",
                     timeout_cmd=timeout_cmd,
                 ) as ret:
-                    it = ret.aiter_text(chunk_size=1)
-                    async for line in _async_event_lines(it):
-                        if line.lower().startswith("content-length:"):
-                            # There tends to be a leading \r\n, so add 2 to the
-                            # length.  If this is not present, there is a
-                            # trailing \r\n\r\n at the end that will just be
-                            # stripped out
-                            chunk_size = int(line.split(":")[1]) + 2
-                            yield await _async_event_info(it, chunk_size)
+                    parser = _EventParser()
+                    async for chunk in ret.aiter_bytes():
+                        for event_info in parser.feed(chunk):
+                            yield event_info
             except ReadTimeoutError:
                 continue
 
@@ -374,6 +385,53 @@ class Event(Http):
             payload = self._build_payload(event_info)
             yield payload["Code"], payload
 
+    @property
+    def event_hub(self) -> EventHub:
+        """Return the hub sharing one event stream between subscribers."""
+        with self._event_hub_lock:
+            hub = self.__dict__.get("_event_hub")
+            if hub is None:
+                hub = self._event_hub = EventHub(self)
+        return hub
+
+    def subscribe_events(
+        self,
+        eventcodes: str,
+        *,
+        maxsize: int = EVENT_QUEUE_MAXSIZE,
+        policy: PolicyT = "drop_oldest",
+    ) -> EventSubscription:
+        """
+        Return a subscription to the (code, payload) tuples of eventcodes.
+
+        Unlike event_actions, all subscriptions of a camera share a single
+        event stream, see EventHub.
+
+        policy: what to do when maxsize events are queued, "drop_oldest",
+        "drop_newest" or "block" to wait for the subscriber
+        """
+        return self.event_hub.subscribe(
+            eventcodes, maxsize=maxsize, policy=policy
+        )
+
+    async def async_subscribe_events(
+        self,
+        eventcodes: str,
+        *,
+        maxsize: int = EVENT_QUEUE_MAXSIZE,
+        policy: PolicyT = "drop_oldest",
+    ) -> AsyncEventSubscription:
+        """Return a subscription to iterate from the running event loop."""
+        return self.event_hub.async_subscribe(
+            eventcodes, maxsize=maxsize, policy=policy
+        )
+
+    def close(self) -> None:
+        hub = self.__dict__.get("_event_hub")
+        if hub is not None:
+            hub.close()
+        super().close()
+
     def _build_payload(self, event_info: str) -> Dict[str, Any]:
         _LOGGER.debug("%s event info: %r", self, event_info)
         payload = {}
@@ -0,0 +1,429 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 2 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# vim:sw=4:ts=4:et
+import abc
+import asyncio
+import concurrent.futures
+import logging
+import queue
+import socket
+import threading
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+import requests
+from typing_extensions import Literal
+
+from .config import EVENT_HUB_RETRY_DELAY, EVENT_QUEUE_MAXSIZE
+from .exceptions import CommError, LoginError
+
+if TYPE_CHECKING:
+    from .event import Event
+
+_LOGGER = logging.getLogger(__name__)
+
+PolicyT = Literal["drop_oldest", "drop_newest", "block"]
+EventT = Tuple[str, Dict[str, Any]]
+
+_POLICIES = ("drop_oldest", "drop_newest", "block")
+# How often a subscriber blocking the hub checks if it was closed.
+_BLOCK_POLL = 1.0
+_CLOSED: Any = object()
+
+
+def _parse_codes(eventcodes: str) -> FrozenSet[str]:
+    return frozenset(
+        code.strip() for code in eventcodes.split(",") if code.strip()
+    )
+
+
+def _shutdown(ret: requests.Response) -> None:
+    """Wake up the thread blocked reading a streamed response."""
+    # Closing the response does not interrupt a read in progress, shutting
+    # down its socket does. Close it when the socket cannot be reached.
+    sock: Any = ret.raw
+    for name in ("_fp", "fp", "raw", "_sock"):
+        sock = getattr(sock, name, None)
+        if sock is None:
+            ret.close()
+            return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+class _Subscription(abc.ABC):
+    def __init__(
+        self,
+        hub: "EventHub",
+        codes: FrozenSet[str],
+        maxsize: int,
+        policy: PolicyT,
+    ) -> None:
+        if policy not in _POLICIES:
+            raise ValueError(f"Unknown policy {policy!r}")
+        self.codes = codes
+        self.policy = policy
+        # Number of events lost because the queue was full.
+        self.dropped = 0
+        self.closed = False
+        self._hub = hub
+        self._maxsize = maxsize
+
+    def matches(self, code: str) -> bool:
+        return "All" in self.codes or code in self.codes
+
+    def close(self) -> None:
+        """Stop receiving events, queued events are dropped."""
+        if self.closed:
+            return
+        self.closed = True
+        self._hub._remove(self)
+        self._wake()
+
+    @abc.abstractmethod
+    def _deliver(self, event: EventT) -> None:
+        """Queue an event according to the policy."""
+
+    @abc.abstractmethod
+    def _wake(self) -> None:
+        """Wake up the consumer waiting for an event."""
+
+
+class EventSubscription(_Subscription):
+    """
+    Events of a hub for a thread.
+
+        with camera.subscribe_events("VideoMotion") as events:
+            for code, payload in events:
+                ...
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._queue: "queue.Queue[Any]" = queue.Queue(self._maxsize)
+
+    def __enter__(self) -> "EventSubscription":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[EventT]:
+        while True:
+            event = self.get()
+            if event is None:
+                return
+            yield event
+
+    def get(self, timeout: Optional[float] = None) -> Optional[EventT]:
+        """Return the next event, or None once closed or on timeout."""
+        try:
+            event = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if event is _CLOSED:
+            self._queue.put_nowait(_CLOSED)
+            return None
+        return event
+
+    def _deliver(self, event: EventT) -> None:
+        if self.policy == "block":
+            while not self.closed:
+                try:
+                    self._queue.put(event, timeout=_BLOCK_POLL)
+                    return
+                except queue.Full:
+                    continue
+            return
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except queue.Full:
+                self.dropped += 1
+                if self.policy == "drop_newest":
+                    return
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+
+    def _wake(self) -> None:
+        while True:
+            try:
+                while True:
+                    self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(_CLOSED)
+                return
+            except queue.Full:
+                continue
+
+
+class AsyncEventSubscription(_Subscription):
+    """
+    Events of a hub for an event loop.
+
+        async with await camera.async_subscribe_events("All") as events:
+            async for code, payload in events:
+                ...
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._loop = asyncio.get_running_loop()
+        self._queue: "asyncio.Queue[Any]" = asyncio.Queue(self._maxsize)
+
+    async def __aenter__(self) -> "AsyncEventSubscription":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+
+    def __aiter__(self) -> AsyncIterator[EventT]:
+        return self
+
+    async def __anext__(self) -> EventT:
+        event = await self.get()
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+    async def get(self) -> Optional[EventT]:
+        """Return the next event, or None once closed."""
+        event = await self._queue.get()
+        if event is _CLOSED:
+            self._queue.put_nowait(_CLOSED)
+            return None
+        return event
+
+    def _put_nowait(self, event: Any) -> None:
+        if self.closed and event is not _CLOSED:
+            return
+        while True:
+            try:
+                self._queue.put_nowait(event)
+                return
+            except asyncio.QueueFull:
+                if event is not _CLOSED:
+                    self.dropped += 1
+                    if self.policy == "drop_newest":
+                        return
+            self._queue.get_nowait()
+
+    def _deliver(self, event: EventT) -> None:
+        try:
+            if self.policy != "block":
+                self._loop.call_soon_threadsafe(self._put_nowait, event)
+                return
+            future = asyncio.run_coroutine_threadsafe(
+                self._queue.put(event), self._loop
+            )
+        except RuntimeError:
+            # The event loop is closed.
+            self.close()
+            return
+        while not self.closed:
+            try:
+                future.result(_BLOCK_POLL)
+                return
+            except concurrent.futures.TimeoutError:
+                continue
+        future.cancel()
+
+    def _wake(self) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._put_nowait, _CLOSED)
+        except RuntimeError:
+            pass
+
+
+class EventHub:
+    """
+    Share one event stream of a camera between many subscribers.
+
+    The stream is opened for all the event codes subscribed to by a thread
+    started with the first subscriber, and closed when the last one is.
+    It is opened again for more codes when a subscriber needs codes it does
+    not cover, but is not narrowed when a subscriber is closed.
+
+    Each subscriber has its own queue of at most maxsize events. When it is
+    full, policy decides whether the oldest or the new event is dropped, or
+    whether the hub waits, which holds back the events of all subscribers.
+    The payloads are shared by the subscribers, do not modify them.
+    """
+
+    def __init__(
+        self, camera: "Event", *, retry_delay: float = EVENT_HUB_RETRY_DELAY
+    ) -> None:
+        self._camera = camera
+        self._retry_delay = retry_delay
+        self._lock = threading.Lock()
+        self._subscriptions: List[_Subscription] = []
+        self._codes: FrozenSet[str] = frozenset()
+        self._thread: Optional[threading.Thread] = None
+        self._response: Optional[requests.Response] = None
+        # Set to reopen the stream, or to stop once nobody subscribes.
+        self._wakeup = threading.Event()
+
+    @property
+    def codes(self) -> FrozenSet[str]:
+        """Return the event codes of the opened stream."""
+        return self._codes
+
+    def subscribe(
+        self,
+        eventcodes: str,
+        *,
+        maxsize: int = EVENT_QUEUE_MAXSIZE,
+        policy: PolicyT = "drop_oldest",
+    ) -> EventSubscription:
+        subscription = EventSubscription(
+            self, _parse_codes(eventcodes), maxsize, policy
+        )
+        self._add(subscription)
+        return subscription
+
+    def async_subscribe(
+        self,
+        eventcodes: str,
+        *,
+        maxsize: int = EVENT_QUEUE_MAXSIZE,
+        policy: PolicyT = "drop_oldest",
+    ) -> AsyncEventSubscription:
+        """Subscribe from a running event loop."""
+        subscription = AsyncEventSubscription(
+            self, _parse_codes(eventcodes), maxsize, policy
+        )
+        self._add(subscription)
+        return subscription
+
+    def close(self) -> None:
+        """Close all the subscriptions, which stops the stream."""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.close()
+
+    def _wanted_codes(self) -> FrozenSet[str]:
+        codes = frozenset().union(
+            *(subscription.codes for subscription in self._subscriptions)
+        )
+        if "All" in codes:
+            return frozenset(("All",))
+        return codes
+
+    def _add(self, subscription: _Subscription) -> None:
+        with self._lock:
+            self._subscriptions.append(subscription)
+            if self._thread is None:
+                self._wakeup.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name=f"{self._camera} events"
+                )
+                self._thread.daemon = True
+                self._thread.start()
+            elif "All" not in self._codes and not (
+                subscription.codes <= self._codes
+            ):
+                self._interrupt()
+
+    def _remove(self, subscription: _Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+            if not self._subscriptions:
+                self._interrupt()
+
+    def _interrupt(self) -> None:
+        self._wakeup.set()
+        if self._response is not None:
+            _shutdown(self._response)
+
+    def _run(self) -> None:
+        try:
+            self._serve()
+        except Exception:
+            _LOGGER.exception("%s Event hub failed", self._camera)
+            with self._lock:
+                self._thread = None
+                self._codes = frozenset()
+                subscriptions = list(self._subscriptions)
+            for subscription in subscriptions:
+                subscription.close()
+
+    def _serve(self) -> None:
+        while True:
+            with self._lock:
+                if not self._subscriptions:
+                    self._thread = None
+                    self._codes = frozenset()
+                    return
+                self._wakeup.clear()
+                self._codes = self._wanted_codes()
+                eventcodes = ",".join(sorted(self._codes))
+            try:
+                ret = self._camera._attach(eventcodes)
+            except (CommError, LoginError) as error:
+                _LOGGER.debug(
+                    "%s Error opening event stream: %r", self._camera, error
+                )
+                self._wakeup.wait(self._retry_delay)
+                continue
+
+            with self._lock:
+                self._response = ret
+            try:
+                if not self._wakeup.is_set():
+                    self._stream(ret)
+            except CommError as error:
+                _LOGGER.debug(
+                    "%s Error during event streaming: %r", self._camera, error
+                )
+            except Exception:
+                # e.g. a malformed part, the next stream may be fine.
+                _LOGGER.exception(
+                    "%s Unexpected error during event streaming", self._camera
+                )
+            finally:
+                with self._lock:
+                    self._response = None
+                ret.close()
+            # Also when the camera ended the stream, not to reconnect in a
+            # loop. Returns right away when interrupted.
+            self._wakeup.wait(self._retry_delay)
+
+    def _stream(self, ret: requests.Response) -> None:
+        for event_info in self._camera._iter_event_info(ret):
+            if self._wakeup.is_set():
+                return
+            try:
+                payload = self._camera._build_payload(event_info)
+            except KeyError:
+                continue
+            code = payload["Code"]
+            with self._lock:
+                subscriptions = list(self._subscriptions)
+            for subscription in subscriptions:
+                if subscription.matches(code):
+                    subscription._deliver((code, payload))
@@ -0,0 +1,82 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 2 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# vim:sw=4:ts=4:et
+import json
+import logging
+import os
+import threading
+from typing import Callable, Dict, NamedTuple, Tuple
+
+_LOGGER = logging.getLogger(__name__)
+
+LayoutT = Callable[[str], str]
+MANIFEST_NAME = "manifest.jsonl"
+
+
+class ExportStats(NamedTuple):
+    files: int
+    skipped: int
+    failed: int
+    bytes: int
+    seconds: float
+
+    @property
+    def throughput(self) -> float:
+        """Return the bytes downloaded per second."""
+        return self.bytes / self.seconds if self.seconds > 0 else 0.0
+
+
+def default_layout(file_path: str) -> str:
+    """Keep the directories of the camera, e.g. mnt/sd/2020-01-06/..."""
+    return file_path.lstrip("/")
+
+
+class Manifest:
+    """
+    JSON lines file of the files already exported, one line per file:
+    {"path": <camera path>, "dest": <path in root>, "size": <bytes>}
+    """
+
+    def __init__(self, path: str, root: str) -> None:
+        self.path = path
+        self.root = root
+        self._lock = threading.Lock()
+        self._done: Dict[str, Tuple[str, int]] = {}
+        try:
+            with open(path, encoding="utf-8") as manifest:
+                for line in manifest:
+                    try:
+                        entry = json.loads(line)
+                        self._done[entry["path"]] = (
+                            entry["dest"],
+                            entry["size"],
+                        )
+                    except (ValueError, KeyError, TypeError):
+                        _LOGGER.debug("Bad manifest line: %r", line)
+        except FileNotFoundError:
+            pass
+
+    def is_done(self, file_path: str, dest: str) -> bool:
+        """Check the file was exported to dest and is still there."""
+        with self._lock:
+            entry = self._done.get(file_path)
+        if entry is None or entry[0] != dest:
+            return False
+        try:
+            return os.path.getsize(os.path.join(self.root, dest)) == entry[1]
+        except OSError:
+            return False
+
+    def add(self, file_path: str, dest: str, size: int) -> None:
+        line = json.dumps({"path": file_path, "dest": dest, "size": size})
+        with self._lock:
+            self._done[file_path] = (dest, size)
+            with open(self.path, "a", encoding="utf-8") as manifest:
+                manifest.write(line + "\n")
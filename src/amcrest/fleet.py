@@ -0,0 +1,231 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 2 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# vim:sw=4:ts=4:et
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Union,
+)
+
+from .config import FLEET_MAX_WORKERS
+from .http import Http
+
+_LOGGER = logging.getLogger(__name__)
+
+MethodT = Union[str, Callable[..., Any]]
+
+
+class FleetResult(NamedTuple):
+    name: str
+    result: Any
+    error: Optional[BaseException]
+
+
+def _call(camera: Http, method: MethodT, args, kwargs) -> Any:
+    if callable(method):
+        return method(camera, *args, **kwargs)
+    # Properties are evaluated here, methods are called with the arguments.
+    value = getattr(camera, method)
+    if callable(value):
+        return value(*args, **kwargs)
+    return value
+
+
+class CameraFleet:
+    """
+    Run the same command on many cameras at the same time.
+
+    Commands are the name of a method or property of the cameras, or a
+    callable given the camera as first argument. Results are yielded as
+    FleetResult tuples, in the order the cameras answered, with the error
+    instead of the result for the cameras that failed, or an
+    asyncio.TimeoutError for those that timed out.
+
+        fleet = CameraFleet({"door": door.camera, "yard": yard.camera})
+        for name, result, error in fleet.run("current_time"):
+            ...
+        async for name, result, error in fleet.async_run(
+            "async_current_time"
+        ):
+            ...
+
+    At most max_workers cameras are queried at once. timeout is the number
+    of seconds each camera is given, counted from the start of its call.
+    A sync call that times out still holds a worker until it returns.
+    """
+
+    def __init__(
+        self,
+        cameras: Union[Mapping[str, Http], Iterable[Http]],
+        *,
+        max_workers: int = FLEET_MAX_WORKERS,
+        timeout: Optional[float] = None,
+    ) -> None:
+        if isinstance(cameras, Mapping):
+            self.cameras: Dict[str, Http] = dict(cameras)
+        else:
+            self.cameras = {}
+            for camera in cameras:
+                name = camera._host
+                if name in self.cameras:
+                    raise ValueError(f"Duplicate camera {name}")
+                self.cameras[name] = camera
+        self._max_workers = max_workers
+        self._timeout = timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.cameras)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self._max_workers, thread_name_prefix="fleet"
+                )
+            return self._executor
+
+    def run(
+        self,
+        method: MethodT,
+        *args,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ) -> Iterator[FleetResult]:
+        """Run a sync command on all cameras in a thread pool."""
+        if timeout is None:
+            timeout = self._timeout
+        executor = self._get_executor()
+        starts: Dict[str, float] = {}
+
+        def call(name: str, camera: Http) -> Any:
+            starts[name] = time.monotonic()
+            return _call(camera, method, args, kwargs)
+
+        pending: Dict["Future[Any]", str] = {
+            executor.submit(call, name, camera): name
+            for name, camera in self.cameras.items()
+        }
+        try:
+            while pending:
+                wait_time = None
+                if timeout is not None:
+                    # Calls not started yet expire at least timeout from now.
+                    now = time.monotonic()
+                    deadline = min(
+                        starts.get(name, now) + timeout
+                        for name in pending.values()
+                    )
+                    wait_time = max(0.0, deadline - now)
+                done, _ = wait(
+                    pending, timeout=wait_time, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    name = pending.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        _LOGGER.debug("%s failed: %r", name, error)
+                        yield FleetResult(name, None, error)
+                    else:
+                        yield FleetResult(name, future.result(), None)
+                if timeout is None:
+                    continue
+                now = time.monotonic()
+                for future, name in list(pending.items()):
+                    if name in starts and starts[name] + timeout <= now:
+                        del pending[future]
+                        _LOGGER.debug("%s timed out", name)
+                        yield FleetResult(name, None, asyncio.TimeoutError())
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def async_run(
+        self,
+        method: MethodT,
+        *args,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ) -> AsyncIterator[FleetResult]:
+        """
+        Run an async command, such as an async_* method or property, on all
+        cameras.
+        """
+        if timeout is None:
+            timeout = self._timeout
+        semaphore = asyncio.Semaphore(self._max_workers)
+
+        async def call(name: str, camera: Http) -> FleetResult:
+            async with semaphore:
+                try:
+                    value = _call(camera, method, args, kwargs)
+                    if inspect.isawaitable(value):
+                        value = await asyncio.wait_for(value, timeout)
+                except Exception as error:
+                    _LOGGER.debug("%s failed: %r", name, error)
+                    return FleetResult(name, None, error)
+                return FleetResult(name, value, None)
+
+        tasks = [
+            asyncio.ensure_future(call(name, camera))
+            for name, camera in self.cameras.items()
+        ]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def close(self) -> None:
+        """Stop the thread pool and close the cameras."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+        for camera in self.cameras.values():
+            camera.close()
+
+    def __enter__(self) -> "CameraFleet":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    async def async_close(self) -> None:
+        """Close the async connections of the cameras."""
+        await asyncio.gather(
+            *(camera.async_close() for camera in self.cameras.values())
+        )
+
+    async def __aenter__(self) -> "CameraFleet":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.async_close()
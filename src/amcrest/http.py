@@ -16,15 +16,30 @@ import re
 import socket
 import ssl
 import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
-from typing import AsyncIterator, Optional, Tuple, Union
+from typing import (
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    MutableMapping,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import httpx
 import requests
 from requests.adapters import HTTPAdapter
+from requests.utils import parse_dict_header
 from urllib3.connection import HTTPConnection
 
+from .batch import ConfigBatch
+from .cache import CacheTtlT, ConfigCache, set_config_names
 from .config import (
+    HTTP_POOL_MAXSIZE,
     KEEPALIVE_COUNT,
     KEEPALIVE_IDLE,
     KEEPALIVE_INTERVAL,
@@ -35,6 +50,7 @@ from .exceptions import CommError, LoginError, ReadTimeoutError
 from .utils import clean_url, pretty
 
 _LOGGER = logging.getLogger(__name__)
+_REG_CONFIG_NAME = re.compile(r"[.\[=]")
 
 _KEEPALIVE_OPTS = HTTPConnection.default_socket_options + [
     (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
@@ -98,6 +114,83 @@ class SOHTTPAdapter(HTTPAdapter):
         super().init_poolmanager(*args, **kwargs)
 
 
+def _multi_get_config_cmd(config_names: Iterable[str]) -> str:
+    names = "".join(f"&name={name}" for name in config_names)
+    return f"configManager.cgi?action=getConfig{names}"
+
+
+def _is_rejected(error: CommError) -> bool:
+    """Check a command failed because the camera answered 400 Bad Request."""
+    response = getattr(error.__cause__, "response", None)
+    return getattr(response, "status_code", None) == 400
+
+
+def _split_config_tables(content: str) -> Dict[str, str]:
+    """Split a getConfig response into the response of each config."""
+    tables: Dict[str, List[str]] = {}
+    for line in content.splitlines():
+        if line.startswith("table."):
+            name = _REG_CONFIG_NAME.split(line[6:], 1)[0]
+            tables.setdefault(name, []).append(line)
+    return {
+        name: "\r\n".join(lines) + "\r\n" for name, lines in tables.items()
+    }
+
+
+class DigestAuth(requests.auth.HTTPDigestAuth):
+    """HTTPDigestAuth sharing the negotiated challenge between threads.
+
+    requests keeps the challenge and nonce count in thread local storage, so
+    each new thread starts with a 401 round trip. Keep them per camera
+    instead, and only ask for a new challenge when the camera rejects the
+    nonce.
+    """
+
+    _thread_local: threading.local
+
+    def __init__(
+        self, username: str, password: str, challenge: Optional[str] = None
+    ) -> None:
+        super().__init__(username, password)
+        self._state_lock = threading.Lock()
+        self._chal: Dict[str, str] = {}
+        self._last_nonce = ""
+        self._nonce_count = 0
+        if challenge:
+            self.set_challenge(challenge)
+
+    def set_challenge(self, header: str) -> None:
+        """Use the Digest challenge of a WWW-Authenticate header."""
+        if not header.lower().startswith("digest "):
+            return
+        chal = parse_dict_header(header[7:])
+        with self._state_lock:
+            self._chal = chal
+            self._last_nonce = chal.get("nonce", "")
+            self._nonce_count = 0
+
+    def init_per_thread_state(self) -> None:
+        super().init_per_thread_state()
+        with self._state_lock:
+            self._thread_local.last_nonce = self._last_nonce
+
+    def build_digest_header(self, method, url):
+        with self._state_lock:
+            local = self._thread_local
+            local.chal = self._chal
+            local.last_nonce = self._last_nonce
+            local.nonce_count = self._nonce_count
+            header = super().build_digest_header(method, url)
+            self._last_nonce = local.last_nonce
+            self._nonce_count = local.nonce_count
+        return header
+
+    def handle_401(self, r, **kwargs):
+        if r.status_code == 401 and self._thread_local.num_401_calls < 2:
+            self.set_challenge(r.headers.get("www-authenticate", ""))
+        return super().handle_401(r, **kwargs)
+
+
 class Http:
     def __init__(
         self,
@@ -111,6 +204,9 @@ class Http:
         ssl_verify: bool = True,
         retries_connection: Optional[int] = None,
         timeout_protocol: TimeoutT = None,
+        pool_maxsize: Optional[int] = None,
+        async_limits: Optional[httpx.Limits] = None,
+        config_cache_ttl: Optional[CacheTtlT] = None,
     ) -> None:
         self._token_lock = threading.Lock()
         try:
@@ -119,6 +215,8 @@ class Http:
             self._async_token_lock = None
         self._cmd_id_lock = threading.Lock()
         self._cmd_id = 0
+        # Guards the lazy creation of the event hub, see Event.event_hub.
+        self._event_hub_lock = threading.Lock()
         self._host = clean_url(host)
         self._port = port
         self._user = user
@@ -134,26 +232,74 @@ class Http:
             else MAX_RETRY_HTTP_CONNECTION
         )
         self._timeout_default = timeout_protocol or TIMEOUT_HTTP_PROTOCOL
+        self._pool_maxsize = pool_maxsize or HTTP_POOL_MAXSIZE
+
+        # The connection pool is shared by all threads, but each thread gets
+        # its own lightweight Session since those are not thread-safe.
+        self._adapter = SOHTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self._pool_maxsize,
+            socket_options=_KEEPALIVE_OPTS,
+        )
+        self._local = threading.local()
+
+        # Same for the async API. Streams can stay open for a long time, so
+        # do not cap the number of connections by default, only the number
+        # of idle ones kept alive.
+        self._async_limits = async_limits or httpx.Limits(
+            max_connections=None,
+            max_keepalive_connections=self._pool_maxsize,
+        )
+        # Clients are bound to the event loop they were created on, keep one
+        # per loop. Those of collected loops are dropped with them.
+        self._async_clients: MutableMapping[
+            asyncio.AbstractEventLoop, httpx.AsyncClient
+        ] = weakref.WeakKeyDictionary()
+        self._async_clients_lock = threading.Lock()
+
+        self._config_cache = (
+            ConfigCache(config_cache_ttl) if config_cache_ttl else None
+        )
+        # If the firmware returns several configs from one getConfig.
+        self._multi_get_config: Optional[bool] = None
+        # Fetches the configs one by one when it does not.
+        self._config_executor: Optional[ThreadPoolExecutor] = None
+        self._config_executor_lock = threading.Lock()
 
         self._token: Optional[requests.auth.AuthBase] = None
         self._async_token: Optional[httpx.Auth] = None
+        # Authentication scheme accepted by the camera ("basic" or "digest")
+        # and the last challenge it sent.
+        self._auth_scheme: Optional[str] = None
+        self._challenge: Optional[str] = None
         self._name: Optional[str] = None
         self._serial: Optional[str] = None
 
     def _generate_token(self) -> None:
         """Create authentation to use with requests."""
         cmd = "magicBox.cgi?action=getMachineName"
-        _LOGGER.debug("%s Trying Basic Authentication", self)
-        self._token = requests.auth.HTTPBasicAuth(self._user, self._password)
+        resp: Optional[str] = None
         try:
-            try:
-                resp = self._command(cmd).content.decode()
-            except LoginError:
-                _LOGGER.debug("%s Trying Digest Authentication", self)
-                self._token = requests.auth.HTTPDigestAuth(
+            if self._auth_scheme != "digest":
+                _LOGGER.debug("%s Trying Basic Authentication", self)
+                self._token = requests.auth.HTTPBasicAuth(
                     self._user, self._password
                 )
+                try:
+                    resp = self._command(cmd).content.decode()
+                except LoginError:
+                    pass
+            if resp is None:
+                _LOGGER.debug("%s Trying Digest Authentication", self)
+                # Answer the challenge of the rejected request right away
+                # instead of waiting for a new one.
+                self._token = DigestAuth(
+                    self._user, self._password, self._challenge
+                )
                 resp = self._command(cmd).content.decode()
+                self._auth_scheme = "digest"
+            else:
+                self._auth_scheme = "basic"
         except CommError:
             self._token = None
             raise
@@ -181,17 +327,24 @@ class Http:
     async def _async_generate_token(self) -> None:
         """Create authentation to use with requests."""
         cmd = "magicBox.cgi?action=getMachineName"
-        _LOGGER.debug("%s Trying async Basic Authentication", self)
-        self._async_token = httpx.BasicAuth(self._user, self._password)
+        resp: Optional[str] = None
         try:
-            try:
-                resp = (await self._async_command(cmd)).content.decode()
-            except LoginError:
+            if self._auth_scheme != "digest":
+                _LOGGER.debug("%s Trying async Basic Authentication", self)
+                self._async_token = httpx.BasicAuth(self._user, self._password)
+                try:
+                    resp = (await self._async_command(cmd)).content.decode()
+                except LoginError:
+                    pass
+            if resp is None:
                 _LOGGER.debug("%s Trying async Digest Authentication", self)
                 self._async_token = httpx.DigestAuth(
                     self._user, self._password
                 )
                 resp = (await self._async_command(cmd)).content.decode()
+                self._auth_scheme = "digest"
+            else:
+                self._auth_scheme = "basic"
         except CommError:
             self._async_token = None
             raise
@@ -216,6 +369,82 @@ class Http:
             .strip()
         )
 
+    def _get_session(self) -> requests.Session:
+        """Return the session of the current thread."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.mount(f"{self._protocol}://", self._adapter)
+        return session
+
+    def close(self) -> None:
+        """Close all pooled connections to the camera."""
+        with self._config_executor_lock:
+            executor, self._config_executor = self._config_executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+        self._close_async_clients()
+        self._adapter.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Return the client shared by the async commands of the running
+        event loop.
+
+        Each event loop gets its own client, created lazily.
+        """
+        loop = asyncio.get_running_loop()
+        with self._async_clients_lock:
+            client = self._async_clients.get(loop)
+            if client is None or client.is_closed:
+                if self._verify:
+                    ssl_context = create_default_ssl_context()
+                else:
+                    ssl_context = create_no_verify_ssl_context()
+                client = self._async_clients[loop] = httpx.AsyncClient(
+                    follow_redirects=True,
+                    verify=ssl_context,
+                    limits=self._async_limits,
+                )
+        return client
+
+    def _close_async_clients(self) -> None:
+        """Close the async clients of the event loops not closed yet."""
+        with self._async_clients_lock:
+            clients = list(self._async_clients.items())
+            self._async_clients.clear()
+        for loop, client in clients:
+            try:
+                if loop.is_running():
+                    asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+                elif not loop.is_closed():
+                    loop.run_until_complete(client.aclose())
+            except RuntimeError as error:
+                _LOGGER.debug(
+                    "%s Could not close async client: %r", self, error
+                )
+
+    async def async_close(self) -> None:
+        """Close all pooled async connections to the camera."""
+        loop = asyncio.get_running_loop()
+        with self._async_clients_lock:
+            client = self._async_clients.pop(loop, None)
+        # Those of other event loops are closed by their loops.
+        self._close_async_clients()
+        if client is not None:
+            await client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.async_close()
+
     def __repr__(self) -> str:
         """Default object representation."""
         if self._name is None:
@@ -247,11 +476,15 @@ class Http:
             retries - maximum number of retries each connection should attempt
             timeout_cmd - timeout
             stream - if True do not download entire response immediately
+            headers - extra request headers
         """
         with self._token_lock:
             if not self._token:
                 self._generate_token()
-        return self._command(*args, **kwargs)
+        try:
+            return self._command(*args, **kwargs)
+        finally:
+            self._invalidate_config(*args, **kwargs)
 
     async def async_command(self, *args, **kwargs) -> httpx.Response:
         if self._async_token_lock is None:
@@ -259,7 +492,19 @@ class Http:
         async with self._async_token_lock:
             if not self._async_token:
                 await self._async_generate_token()
-        return await self._async_command(*args, **kwargs)
+        try:
+            return await self._async_command(*args, **kwargs)
+        finally:
+            self._invalidate_config(*args, **kwargs)
+
+    def _invalidate_config(self, cmd: str, *args, **kwargs) -> None:
+        if self._config_cache is not None:
+            self._config_cache.invalidate(set_config_names(cmd))
+
+    def clear_config_cache(self) -> None:
+        """Drop all cached getConfig responses."""
+        if self._config_cache is not None:
+            self._config_cache.clear()
 
     @asynccontextmanager
     async def async_stream_command(
@@ -279,6 +524,7 @@ class Http:
         retries: Optional[int] = None,
         timeout_cmd: TimeoutT = None,
         stream: bool = False,
+        headers: Optional[Dict[str, str]] = None,
     ) -> requests.Response:
         url = self.__base_url(cmd)
         with self._cmd_id_lock:
@@ -287,53 +533,40 @@ class Http:
         if retries is None:
             retries = self._retries_default
         timeout = timeout_cmd or self._timeout_default
-        with requests.Session() as session:
-            if isinstance(timeout, float):
-                use_keepalive = False
-            else:
-                use_keepalive = timeout[0] is None or timeout[1] is None
-            if use_keepalive:
-                session.mount(
-                    "{0}://".format(self._protocol),
-                    SOHTTPAdapter(socket_options=_KEEPALIVE_OPTS),
-                )
-            for loop in range(1, 2 + retries):
-                _LOGGER.debug(
-                    "%s Running query %i attempt %s", self, cmd_id, loop
+        session = self._get_session()
+        for loop in range(1, 2 + retries):
+            _LOGGER.debug("%s Running query %i attempt %s", self, cmd_id, loop)
+            try:
+                resp = session.get(
+                    url,
+                    auth=self._token,
+                    headers=headers,
+                    stream=stream,
+                    timeout=timeout,
+                    verify=self._verify,
                 )
-                try:
-                    resp = session.get(
-                        url,
-                        auth=self._token,
-                        stream=stream,
-                        timeout=timeout,
-                        verify=self._verify,
-                    )
-                    if resp.status_code == 401:
-                        _LOGGER.debug(
-                            "%s Query %i: Unauthorized (401)", self, cmd_id
-                        )
-                        self._token = None
-                        raise LoginError()
-                    resp.raise_for_status()
-                except requests.RequestException as error:
+                if resp.status_code == 401:
                     _LOGGER.debug(
-                        "%s Query %i failed due to error: %r",
-                        self,
-                        cmd_id,
-                        error,
+                        "%s Query %i: Unauthorized (401)", self, cmd_id
                     )
-                    if loop > retries:
-                        raise CommError(error) from error
-                    msg = re.sub(
-                        r"at 0x[0-9a-fA-F]+", "at ADDRESS", repr(error)
-                    )
-                    _LOGGER.warning(
-                        "%s Trying again due to error: %s", self, msg
-                    )
-                    continue
-                else:
-                    break
+                    self._token = None
+                    self._challenge = resp.headers.get("WWW-Authenticate")
+                    raise LoginError()
+                resp.raise_for_status()
+            except requests.RequestException as error:
+                _LOGGER.debug(
+                    "%s Query %i failed due to error: %r",
+                    self,
+                    cmd_id,
+                    error,
+                )
+                if loop > retries:
+                    raise CommError(error) from error
+                msg = re.sub(r"at 0x[0-9a-fA-F]+", "at ADDRESS", repr(error))
+                _LOGGER.warning("%s Trying again due to error: %s", self, msg)
+                continue
+            else:
+                break
 
         _LOGGER.debug(
             "%s Query %i worked. Exit code: <%s>",
@@ -363,48 +596,34 @@ class Http:
         else:
             httpx_timeout = timeout
 
-        if self._verify:
-            ssl_context = create_default_ssl_context()
-        else:
-            ssl_context = create_no_verify_ssl_context()
-
-        async with httpx.AsyncClient(
-            follow_redirects=True,
-            auth=self._async_token,
-            verify=ssl_context,
-            timeout=httpx_timeout,
-        ) as client:
-            for loop in range(1, 2 + retries):
-                _LOGGER.debug(
-                    "%s Running query %i attempt %s", self, cmd_id, loop
+        client = self._get_async_client()
+        for loop in range(1, 2 + retries):
+            _LOGGER.debug("%s Running query %i attempt %s", self, cmd_id, loop)
+            try:
+                resp = await client.get(
+                    url, auth=self._async_token, timeout=httpx_timeout
                 )
-                try:
-                    resp = await client.get(url)
-                    if resp.status_code == 401:
-                        _LOGGER.debug(
-                            "%s Query %i: Unauthorized (401)", self, cmd_id
-                        )
-                        self._async_token = None
-                        raise LoginError()
-                    resp.raise_for_status()
-                except httpx.HTTPError as error:
+                if resp.status_code == 401:
                     _LOGGER.debug(
-                        "%s Query %i failed due to error: %r",
-                        self,
-                        cmd_id,
-                        error,
-                    )
-                    if loop > retries:
-                        raise CommError(error) from error
-                    msg = re.sub(
-                        r"at 0x[0-9a-fA-F]+", "at ADDRESS", repr(error)
-                    )
-                    _LOGGER.warning(
-                        "%s Trying again due to error: %s", self, msg
+                        "%s Query %i: Unauthorized (401)", self, cmd_id
                     )
-                    continue
-                else:
-                    break
+                    self._async_token = None
+                    raise LoginError()
+                resp.raise_for_status()
+            except httpx.HTTPError as error:
+                _LOGGER.debug(
+                    "%s Query %i failed due to error: %r",
+                    self,
+                    cmd_id,
+                    error,
+                )
+                if loop > retries:
+                    raise CommError(error) from error
+                msg = re.sub(r"at 0x[0-9a-fA-F]+", "at ADDRESS", repr(error))
+                _LOGGER.warning("%s Trying again due to error: %s", self, msg)
+                continue
+            else:
+                break
 
         _LOGGER.debug(
             "%s Query %i worked. Exit code: <%s>",
@@ -419,6 +638,7 @@ class Http:
         self,
         cmd: str,
         timeout_cmd: TimeoutT = None,
+        headers: Optional[Dict[str, str]] = None,
     ) -> AsyncIterator[httpx.Response]:
         url = self.__base_url(cmd)
         cmd_id = self._cmd_id = self._cmd_id + 1
@@ -432,40 +652,41 @@ class Http:
         else:
             httpx_timeout = timeout
 
-        async with httpx.AsyncClient(
-            follow_redirects=True,
-            auth=self._async_token,
-            verify=self._verify,
-            timeout=httpx_timeout,
-        ) as client:
-            try:
-                async with client.stream("GET", url) as resp:
-                    if resp.status_code == 401:
-                        _LOGGER.debug(
-                            "%s Query %i: Unauthorized (401)", self, cmd_id
-                        )
-                        self._async_token = None
-                        raise LoginError()
-                    resp.raise_for_status()
-
+        client = self._get_async_client()
+        try:
+            async with client.stream(
+                "GET",
+                url,
+                auth=self._async_token,
+                headers=headers,
+                timeout=httpx_timeout,
+            ) as resp:
+                if resp.status_code == 401:
                     _LOGGER.debug(
-                        "%s Query %i worked. Exit code: <%s>",
-                        self,
-                        cmd_id,
-                        resp.status_code,
+                        "%s Query %i: Unauthorized (401)", self, cmd_id
                     )
-                    yield resp
-            except httpx.HTTPError as error:
+                    self._async_token = None
+                    raise LoginError()
+                resp.raise_for_status()
+
                 _LOGGER.debug(
-                    "%s Query %i failed due to error: %r",
+                    "%s Query %i worked. Exit code: <%s>",
                     self,
                     cmd_id,
-                    error,
+                    resp.status_code,
                 )
-                if isinstance(error, httpx.ReadTimeout):
-                    raise ReadTimeoutError(error) from error
-                else:
-                    raise CommError(error) from error
+                yield resp
+        except httpx.HTTPError as error:
+            _LOGGER.debug(
+                "%s Query %i failed due to error: %r",
+                self,
+                cmd_id,
+                error,
+            )
+            if isinstance(error, httpx.ReadTimeout):
+                raise ReadTimeoutError(error) from error
+            else:
+                raise CommError(error) from error
 
     def command_audio(
         self,
@@ -479,7 +700,7 @@ class Http:
                 self._generate_token()
         url = self.__base_url(cmd)
         try:
-            requests.post(
+            self._get_session().post(
                 url,
                 files=file_content,
                 auth=self._token,
@@ -492,17 +713,141 @@ class Http:
     # Helpers for common commands
 
     def _get_config(self, config_name: str) -> str:
+        if self._config_cache is not None:
+            return self._config_cache.get(config_name, self._fetch_config)
+        return self._fetch_config(config_name)
+
+    async def _async_get_config(self, config_name: str) -> str:
+        if self._config_cache is not None:
+            return await self._config_cache.async_get(
+                config_name, self._async_fetch_config
+            )
+        return await self._async_fetch_config(config_name)
+
+    def _fetch_config(self, config_name: str) -> str:
         ret = self.command(
             f"configManager.cgi?action=getConfig&name={config_name}"
         )
         return ret.content.decode()
 
-    async def _async_get_config(self, config_name: str) -> str:
+    async def _async_fetch_config(self, config_name: str) -> str:
         ret = await self.async_command(
             f"configManager.cgi?action=getConfig&name={config_name}"
         )
         return ret.content.decode()
 
+    def get_configs(self, config_names: Iterable[str]) -> Dict[str, str]:
+        """
+        Return the getConfig response of each config name.
+
+        Firmwares that support it return all the configs from a single
+        request, the others are fetched concurrently.
+        """
+        config_names = list(config_names)
+        configs, missing, generations = self._cached_configs(config_names)
+        if len(missing) > 1 and self._multi_get_config is not False:
+            try:
+                ret = self.command(_multi_get_config_cmd(missing))
+            except CommError as error:
+                _LOGGER.debug("%s Multiple getConfig failed: %r", self, error)
+                # Only give up on it when rejected, not on e.g. a timeout.
+                if _is_rejected(error):
+                    self._multi_get_config = False
+            else:
+                missing = self._add_configs(
+                    configs, missing, generations, ret.content.decode()
+                )
+        if missing:
+            for name, config in zip(
+                missing,
+                self._get_config_executor().map(self._get_config, missing),
+            ):
+                configs[name] = config
+        return {name: configs[name] for name in config_names}
+
+    def _get_config_executor(self) -> ThreadPoolExecutor:
+        with self._config_executor_lock:
+            if self._config_executor is None:
+                self._config_executor = ThreadPoolExecutor(
+                    self._pool_maxsize, thread_name_prefix="getConfig"
+                )
+            return self._config_executor
+
+    async def async_get_configs(
+        self, config_names: Iterable[str]
+    ) -> Dict[str, str]:
+        """Return the getConfig response of each config name."""
+        config_names = list(config_names)
+        configs, missing, generations = self._cached_configs(config_names)
+        if len(missing) > 1 and self._multi_get_config is not False:
+            try:
+                ret = await self.async_command(_multi_get_config_cmd(missing))
+            except CommError as error:
+                _LOGGER.debug("%s Multiple getConfig failed: %r", self, error)
+                # Only give up on it when rejected, not on e.g. a timeout.
+                if _is_rejected(error):
+                    self._multi_get_config = False
+            else:
+                missing = self._add_configs(
+                    configs, missing, generations, ret.content.decode()
+                )
+        if missing:
+            for name, config in zip(
+                missing,
+                await asyncio.gather(
+                    *(self._async_get_config(name) for name in missing)
+                ),
+            ):
+                configs[name] = config
+        return {name: configs[name] for name in config_names}
+
+    def config_batch(
+        self, max_url_length: Optional[int] = None
+    ) -> ConfigBatch:
+        """Return a builder merging many setConfig updates."""
+        return ConfigBatch(self, max_url_length)
+
+    def _cached_configs(
+        self, config_names: Iterable[str]
+    ) -> Tuple[Dict[str, str], List[str], Dict[str, int]]:
+        configs: Dict[str, str] = {}
+        missing: List[str] = []
+        generations: Dict[str, int] = {}
+        for name in dict.fromkeys(config_names):
+            if self._config_cache is not None:
+                config, generations[name] = self._config_cache.peek(name)
+                if config is not None:
+                    configs[name] = config
+                    continue
+            missing.append(name)
+        return configs, missing, generations
+
+    def _add_configs(
+        self,
+        configs: Dict[str, str],
+        names: List[str],
+        generations: Dict[str, int],
+        content: str,
+    ) -> List[str]:
+        """Add the configs found in a response, return the missing ones."""
+        tables = _split_config_tables(content)
+        # Firmwares without support only return the first config, but the
+        # others may also be missing because they are unknown.
+        found = len(tables.keys() & set(names))
+        if found > 1:
+            self._multi_get_config = True
+        elif found == 1 and names[0] in tables:
+            self._multi_get_config = False
+        missing = []
+        for name in names:
+            if name not in tables:
+                missing.append(name)
+                continue
+            configs[name] = tables[name]
+            if self._config_cache is not None:
+                self._config_cache.put(name, generations[name], tables[name])
+        return missing
+
     def _magic_box(self, action: str) -> str:
         ret = self.command(f"magicBox.cgi?action={action}")
         return ret.content.decode()
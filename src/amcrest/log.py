@@ -10,10 +10,60 @@
 # vim:sw=4:ts=4:et
 
 from datetime import datetime
-from typing import AsyncIterator, Iterator
+from functools import partial
+from typing import (
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Union,
+    overload,
+)
+
+from typing_extensions import Literal
 
 from .http import Http
-from .utils import date_to_str
+from .paging import PageSizer
+from .table import ConfigTable
+from .utils import date_to_str, str_to_date
+
+
+class LogRecord(NamedTuple):
+    """An entry of the log of a camera."""
+
+    time: datetime
+    type: str
+    user: str
+    level: int
+    # Detail.* fields without the prefix, e.g. {"Address": "192.168.1.2"}.
+    detail: Dict[str, str]
+
+
+def parse_log_records(content: str) -> List[LogRecord]:
+    """Return the entries of a doFind page, in order."""
+    records = []
+    for item in ConfigTable(content).entries("items"):
+        try:
+            time = str_to_date(item.pop("Time"))
+        except (KeyError, ValueError):
+            continue
+        level = item.pop("Level", "")
+        records.append(
+            LogRecord(
+                time=time,
+                type=item.pop("Type", ""),
+                user=item.pop("User", ""),
+                level=int(level) if level.isdigit() else 0,
+                detail={
+                    key[7:]: value
+                    for key, value in item.items()
+                    if key.startswith("Detail.")
+                },
+            )
+        )
+    return records
 
 
 class Log(Http):
@@ -67,15 +117,21 @@ class Log(Http):
 
         return ret.content.decode()
 
-    def log_find_next(self, token: str, count: int = 100) -> str:
+    def log_find_next(
+        self, token: str, count: int = 100, retries: Optional[int] = None
+    ) -> str:
         ret = self.command(
-            f"log.cgi?action=doFind&token={token}&count={count}"
+            f"log.cgi?action=doFind&token={token}&count={count}",
+            retries=retries,
         )
         return ret.content.decode()
 
-    async def async_log_find_next(self, token: str, count: int = 100) -> str:
+    async def async_log_find_next(
+        self, token: str, count: int = 100, retries: Optional[int] = None
+    ) -> str:
         ret = await self.async_command(
-            f"log.cgi?action=doFind&token={token}&count={count}"
+            f"log.cgi?action=doFind&token={token}&count={count}",
+            retries=retries,
         )
         return ret.content.decode()
 
@@ -89,24 +145,125 @@ class Log(Http):
         )
         return ret.content.decode()
 
+    @overload
     def log_find(
-        self, start_time: datetime, end_time: datetime
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        *,
+        records: Literal[False] = ...,
+        count: int = ...,
+        max_count: Optional[int] = ...,
+    ) -> Iterator[str]:
+        ...
+
+    @overload
+    def log_find(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        *,
+        records: Literal[True],
+        count: int = ...,
+        max_count: Optional[int] = ...,
+    ) -> Iterator[LogRecord]:
+        ...
+
+    def log_find(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        *,
+        records: bool = False,
+        count: int = 100,
+        max_count: Optional[int] = None,
+    ) -> Union[Iterator[str], Iterator[LogRecord]]:
+        """
+        Yield the pages of log entries between start_time and end_time.
+
+        records: if True, yield a LogRecord per entry instead of the text of
+        each page. Pages are parsed one at a time as they arrive.
+
+        count: number of entries of each page. If max_count is given, pages
+        grow up to max_count entries while the camera answers quickly, and
+        shrink when it is slow, see PageSizer. Entries of a page that timed
+        out may be missing.
+        """
+        pages = self._log_find_pages(
+            start_time, end_time, PageSizer(count, max_count)
+        )
+        if not records:
+            return pages
+        return (
+            record
+            for content in pages
+            for record in parse_log_records(content)
+        )
+
+    def _log_find_pages(
+        self, start_time: datetime, end_time: datetime, sizer: PageSizer
     ) -> Iterator[str]:
         token = self.log_find_start(start_time, end_time).strip().split("=")[1]
 
         while True:
-            content = self.log_find_next(token)
-            tag, _, count = content.split("\r\n", 1)[0].partition("=")
+            content = sizer.fetch(
+                partial(self.log_find_next, token, retries=0)
+            )
+            tag, _, found = content.split("\r\n", 1)[0].partition("=")
 
             yield content
 
-            if tag != "found" or int(count) == 0:
+            if tag != "found" or int(found) == 0:
                 break
 
         self.log_find_stop(token)
 
-    async def async_log_find(
-        self, start_time: datetime, end_time: datetime
+    @overload
+    def async_log_find(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        *,
+        records: Literal[False] = ...,
+        count: int = ...,
+        max_count: Optional[int] = ...,
+    ) -> AsyncIterator[str]:
+        ...
+
+    @overload
+    def async_log_find(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        *,
+        records: Literal[True],
+        count: int = ...,
+        max_count: Optional[int] = ...,
+    ) -> AsyncIterator[LogRecord]:
+        ...
+
+    def async_log_find(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        *,
+        records: bool = False,
+        count: int = 100,
+        max_count: Optional[int] = None,
+    ) -> Union[AsyncIterator[str], AsyncIterator[LogRecord]]:
+        pages = self._async_log_find_pages(
+            start_time, end_time, PageSizer(count, max_count)
+        )
+        if not records:
+            return pages
+        return (
+            record
+            async for content in pages
+            for record in parse_log_records(content)
+        )
+
+    async def _async_log_find_pages(
+        self, start_time: datetime, end_time: datetime, sizer: PageSizer
     ) -> AsyncIterator[str]:
         token = (
             (await self.async_log_find_start(start_time, end_time))
@@ -115,12 +272,14 @@ class Log(Http):
         )
 
         while True:
-            content = await self.async_log_find_next(token)
-            tag, _, count = content.split("\r\n", 1)[0].partition("=")
+            content = await sizer.async_fetch(
+                partial(self.async_log_find_next, token, retries=0)
+            )
+            tag, _, found = content.split("\r\n", 1)[0].partition("=")
 
             yield content
 
-            if tag != "found" or int(count) == 0:
+            if tag != "found" or int(found) == 0:
                 break
 
         await self.async_log_find_stop(token)
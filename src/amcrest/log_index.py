@@ -0,0 +1,189 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 2 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# vim:sw=4:ts=4:et
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Iterable, List, Optional, Tuple
+
+from .log import Log, LogRecord
+from .utils import DATEFMT
+
+_LOGGER = logging.getLogger(__name__)
+
+# Start of the first sync of a camera that is not indexed yet.
+_EPOCH = datetime(2000, 1, 1)
+
+# Entries are not unique: the camera logs at one second resolution, so
+# repeated events in the same second have identical fields.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    camera TEXT NOT NULL,
+    time TEXT NOT NULL,
+    type TEXT NOT NULL,
+    user TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    detail TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS logs_type ON logs (camera, type, time);
+CREATE INDEX IF NOT EXISTS logs_user ON logs (camera, user, time);
+"""
+
+_COLUMNS = "time, type, user, level, detail"
+
+
+def _to_row(camera: str, record: LogRecord) -> Tuple[Any, ...]:
+    return (
+        camera,
+        record.time.strftime(DATEFMT),
+        record.type,
+        record.user,
+        record.level,
+        json.dumps(record.detail, sort_keys=True),
+    )
+
+
+def _from_row(row: Tuple[Any, ...]) -> LogRecord:
+    return LogRecord(
+        time=datetime.strptime(row[0], DATEFMT),
+        type=row[1],
+        user=row[2],
+        level=row[3],
+        detail=json.loads(row[4]),
+    )
+
+
+class LogIndex:
+    """
+    SQLite store of the log entries of cameras, to filter them by type or
+    user without searching the cameras.
+
+        index = LogIndex("logs.db")
+        index.sync(camera, "door")
+        index.records("door", type="Login")
+
+    Cameras are identified by a name chosen by the caller, the host of the
+    camera by default.
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "LogIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def last_time(self, name: str) -> Optional[datetime]:
+        """Return the time of the last stored entry."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT MAX(time) FROM logs WHERE camera = ?", (name,)
+            ).fetchone()
+        if row[0] is None:
+            return None
+        return datetime.strptime(row[0], DATEFMT)
+
+    def add(self, name: str, records: Iterable[LogRecord]) -> int:
+        """Add the entries, return how many were added."""
+        rows = [_to_row(name, record) for record in records]
+        with self._lock, self._db:
+            return self._insert(rows)
+
+    def _insert(self, rows: List[Tuple[Any, ...]]) -> int:
+        before = self._db.total_changes
+        self._db.executemany(
+            f"INSERT INTO logs (camera, {_COLUMNS})"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        return self._db.total_changes - before
+
+    def sync(
+        self,
+        camera: Log,
+        name: Optional[str] = None,
+        *,
+        end_time: Optional[datetime] = None,
+        **find_kwargs,
+    ) -> int:
+        """
+        Store the entries logged since the last stored entry, return how
+        many were added.
+
+        find_kwargs are passed to log_find(), e.g. max_count=1000.
+        """
+        if name is None:
+            name = camera._host
+        if end_time is None:
+            end_time = datetime.now().replace(microsecond=0)
+
+        # The entries of the last stored second are fetched again, as the
+        # camera may have logged more of them since: they replace the
+        # stored ones.
+        last_time = self.last_time(name)
+        rows = [
+            _to_row(name, record)
+            for record in camera.log_find(
+                last_time or _EPOCH, end_time, records=True, **find_kwargs
+            )
+        ]
+        with self._lock, self._db:
+            removed = 0
+            if last_time is not None:
+                removed = self._db.execute(
+                    "DELETE FROM logs WHERE camera = ? AND time = ?",
+                    (name, last_time.strftime(DATEFMT)),
+                ).rowcount
+            added = self._insert(rows) - removed
+        _LOGGER.debug("%s Stored %i log entries of %s", camera, added, name)
+        return added
+
+    def records(
+        self,
+        name: str,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        *,
+        type: Optional[str] = None,
+        user: Optional[str] = None,
+    ) -> List[LogRecord]:
+        """
+        Return the stored entries between start_time and end_time, both
+        included, of the given type and user if any, in order.
+        """
+        query = f"SELECT {_COLUMNS} FROM logs WHERE camera = ?"
+        params: Tuple[Any, ...] = (name,)
+        if type is not None:
+            query += " AND type = ?"
+            params += (type,)
+        if user is not None:
+            query += " AND user = ?"
+            params += (user,)
+        if start_time is not None:
+            query += " AND time >= ?"
+            params += (start_time.strftime(DATEFMT),)
+        if end_time is not None:
+            query += " AND time <= ?"
+            params += (end_time.strftime(DATEFMT),)
+        with self._lock:
+            rows = self._db.execute(
+                query + " ORDER BY time, rowid", params
+            ).fetchall()
+        return [_from_row(row) for row in rows]
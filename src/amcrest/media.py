@@ -9,15 +9,193 @@
 #
 # vim:sw=4:ts=4:et
 
+import asyncio
 import logging
-from datetime import datetime
-from typing import Iterator, Optional, Sequence
-
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from datetime import datetime, timedelta
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+    overload,
+)
+
+from requests import RequestException
+from typing_extensions import Literal
+
+from .config import (
+    DOWNLOAD_CHUNK_SIZE,
+    EXPORT_MAX_WORKERS,
+    MAX_MEDIA_FACTORIES,
+)
+from .exceptions import CommError, LoginError, ReadTimeoutError
+from .export import (
+    MANIFEST_NAME,
+    ExportStats,
+    LayoutT,
+    Manifest,
+    default_layout,
+)
 from .http import Http, TimeoutT
-from .utils import date_to_str
+from .paging import PageSizer
+from .table import ConfigTable
+from .utils import date_to_str, str_to_date
 
 _LOGGER = logging.getLogger(__name__)
 
+# Pages of files read ahead for each shard of a sharded search, and how
+# often a search blocked on a full queue checks if it was stopped.
+SHARD_QUEUE_PAGES = 4
+_SHARD_POLL = 0.5
+
+DestT = Union[str, "os.PathLike[str]", BinaryIO]
+ProgressT = Callable[[int, Optional[int]], None]
+
+
+@contextmanager
+def _open_dest(dest: DestT, resume: bool) -> Iterator[Tuple[BinaryIO, int]]:
+    """Yield the file to write and the size already downloaded."""
+    if not isinstance(dest, (str, os.PathLike)):
+        yield dest, 0
+        return
+    with open(dest, "ab" if resume else "wb") as fileobj:
+        yield fileobj, fileobj.tell()
+
+
+def _restart(fileobj: BinaryIO, start: int) -> None:
+    """Drop the partial download, the camera sent the whole file."""
+    fileobj.seek(start)
+    fileobj.truncate()
+
+
+def _total_size(headers: Mapping[str, str], offset: int) -> Optional[int]:
+    """Return the file size from the headers of a (partial) response."""
+    content_range = headers.get("Content-Range")
+    if content_range:
+        total = content_range.rpartition("/")[2]
+        return int(total) if total.isdigit() else None
+    length = headers.get("Content-Length")
+    if length and length.isdigit():
+        return offset + int(length)
+    return None
+
+
+def _complete_size(error: Exception, offset: int) -> Optional[int]:
+    """
+    Return the file size if a range request failed because the file was
+    already fully downloaded.
+    """
+    response = getattr(error.__cause__, "response", None)
+    if offset and response is not None and response.status_code == 416:
+        total = _total_size(response.headers, 0)
+        if total == offset:
+            return total
+    return None
+
+
+def _check_size(file_path: str, size: int, total: Optional[int]) -> int:
+    if total is not None and size != total:
+        raise CommError(f"Downloaded {size} of {total} bytes of {file_path}")
+    return size
+
+
+class MediaFile(NamedTuple):
+    """A file found by find_files(records=True)."""
+
+    channel: int
+    file_path: str
+    start_time: datetime
+    end_time: datetime
+    # Size in bytes and duration in seconds.
+    length: int
+    duration: int
+    type: str
+    events: Tuple[str, ...]
+    flags: Tuple[str, ...]
+
+
+def _to_date(value: str) -> datetime:
+    # Much faster than strptime for the usual 'YYYY-MM-DD hh:mm:ss'.
+    try:
+        return datetime(
+            int(value[0:4]),
+            int(value[5:7]),
+            int(value[8:10]),
+            int(value[11:13]),
+            int(value[14:16]),
+            int(value[17:19]),
+        )
+    except ValueError:
+        return str_to_date(value)
+
+
+def _to_int(value: Optional[str]) -> int:
+    return int(value) if value and value.isdigit() else 0
+
+
+def _array(item: Dict[str, str], name: str) -> Tuple[str, ...]:
+    prefix = f"{name}["
+    return tuple(
+        value for key, value in item.items() if key.startswith(prefix)
+    )
+
+
+def parse_media_files(content: str) -> List[MediaFile]:
+    """Return the files of a findNextFile page, in order."""
+    # Not parse_config(): pages are only parsed once, caching them would
+    # only keep them in memory.
+    files = []
+    for item in ConfigTable(content).entries("items"):
+        if "FilePath" not in item:
+            continue
+        try:
+            files.append(
+                MediaFile(
+                    channel=_to_int(item.get("Channel")),
+                    file_path=item["FilePath"],
+                    start_time=_to_date(item["StartTime"]),
+                    end_time=_to_date(item["EndTime"]),
+                    length=_to_int(item.get("Length")),
+                    duration=_to_int(item.get("Duration")),
+                    type=item.get("Type", ""),
+                    events=_array(item, "Events"),
+                    flags=_array(item, "Flags"),
+                )
+            )
+        except (KeyError, ValueError) as error:
+            _LOGGER.debug("Bad media file %r: %r", item, error)
+    return files
+
+
+def _shard_bounds(
+    start_time: datetime, end_time: datetime, shards: int
+) -> List[Tuple[datetime, datetime]]:
+    """Split a time range in up to shards ranges of whole seconds."""
+    seconds = int((end_time - start_time).total_seconds())
+    shards = max(1, min(shards, seconds))
+    times = [
+        start_time + timedelta(seconds=seconds * index // shards)
+        for index in range(shards)
+    ]
+    return list(zip(times, times[1:] + [end_time]))
+
 
 class Media(Http):
     def factory_create(self) -> str:
@@ -104,14 +282,58 @@ class Media(Http):
         )
         return ret.content.decode()
 
-    def media_file_find_next(self, factory_id: str, count: int = 100) -> str:
+    def media_file_find_next(
+        self,
+        factory_id: str,
+        count: int = 100,
+        retries: Optional[int] = None,
+    ) -> str:
         ret = self.command(
             "mediaFileFind.cgi?action=findNextFile&"
-            f"object={factory_id}&count={count}"
+            f"object={factory_id}&count={count}",
+            retries=retries,
         )
 
         return ret.content.decode()
 
+    @overload
+    def find_files(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        channel: int = ...,
+        directories: Sequence[str] = ...,
+        types: Sequence[str] = ...,
+        flags: Sequence[str] = ...,
+        events: Sequence[str] = ...,
+        stream: Optional[str] = ...,
+        *,
+        records: Literal[False] = ...,
+        count: int = ...,
+        max_count: Optional[int] = ...,
+    ) -> Generator[str, None, None]:
+        ...
+
+    @overload
+    def find_files(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        channel: int = ...,
+        directories: Sequence[str] = ...,
+        types: Sequence[str] = ...,
+        flags: Sequence[str] = ...,
+        events: Sequence[str] = ...,
+        stream: Optional[str] = ...,
+        *,
+        records: Literal[True],
+        count: int = ...,
+        max_count: Optional[int] = ...,
+        shards: int = ...,
+        max_factories: int = ...,
+    ) -> Iterator[MediaFile]:
+        ...
+
     def find_files(
         self,
         start_time: datetime,
@@ -122,7 +344,13 @@ class Media(Http):
         flags: Sequence[str] = (),
         events: Sequence[str] = (),
         stream: Optional[str] = None,
-    ) -> Iterator[str]:
+        *,
+        records: bool = False,
+        count: int = 100,
+        max_count: Optional[int] = None,
+        shards: int = 1,
+        max_factories: int = MAX_MEDIA_FACTORIES,
+    ) -> Union[Generator[str, None, None], Iterator[MediaFile]]:
         """
         https://s3.amazonaws.com/amcrest-files/Amcrest+HTTP+API+3.2017.pdf
 
@@ -147,7 +375,68 @@ class Media(Http):
                 events. stream : which video stream type you want to find.
                 The range of stream is {"Main", "Extra1", "Extra2", "Extra3"}.
                 If omitted, find files with all the stream types.
+
+        records : if True, yield a MediaFile per file instead of the text of
+                each findNextFile page.
+
+        count : number of files of each page. If max_count is given, pages
+                grow up to max_count files while the camera answers quickly,
+                and shrink when it is slow, see PageSizer. Files of a page
+                that timed out may be missing.
+
+        shards : with records, split the time range in that many parts
+                searched concurrently, by at most max_factories searches at
+                a time. Files are yielded in the order of the parts, files
+                found by several parts only once.
         """
+        if shards > 1:
+            if not records:
+                raise ValueError("Sharded searches need records=True")
+            return self._find_sharded_files(
+                start_time,
+                end_time,
+                shards,
+                max_factories,
+                count,
+                max_count,
+                channel=channel,
+                directories=directories,
+                types=types,
+                flags=flags,
+                events=events,
+                stream=stream,
+            )
+        pages = self._find_file_pages(
+            start_time,
+            end_time,
+            channel=channel,
+            directories=directories,
+            types=types,
+            flags=flags,
+            events=events,
+            stream=stream,
+            sizer=PageSizer(count, max_count),
+        )
+        if not records:
+            return pages
+        return (
+            media_file
+            for content in pages
+            for media_file in parse_media_files(content)
+        )
+
+    def _find_file_pages(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        channel: int,
+        directories: Sequence[str],
+        types: Sequence[str],
+        flags: Sequence[str],
+        events: Sequence[str],
+        stream: Optional[str],
+        sizer: PageSizer,
+    ) -> Generator[str, None, None]:
         factory_id = self.factory_create().strip().split("=")[1]
         _LOGGER.debug("%s findFile for factory_id=%s", self, factory_id)
 
@@ -163,10 +452,18 @@ class Media(Http):
             stream=stream,
         )
 
-        if "ok" in search.lower():
+        if "ok" not in search.lower():
+            _LOGGER.debug("%s returned error: %s", self, search)
+            return
+
+        # Also release the factory when the search is not read to the end,
+        # cameras only allow a few of them.
+        try:
             while True:
                 _LOGGER.debug("%s findNextFile", self)
-                content = self.media_file_find_next(factory_id)
+                content = sizer.fetch(
+                    partial(self.media_file_find_next, factory_id, retries=0)
+                )
 
                 # The first line is 'found=N'.
                 # However, it can be 'Error' if e.g. no more files found
@@ -182,11 +479,86 @@ class Media(Http):
                     break
 
                 yield content
-
+        finally:
             self.factory_close(factory_id)
             self.factory_destroy(factory_id)
-        else:
-            _LOGGER.debug("%s returned error: %s", self, search)
+
+    def _find_sharded_files(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        shards: int,
+        max_factories: int,
+        count: int,
+        max_count: Optional[int],
+        **conditions,
+    ) -> Iterator[MediaFile]:
+        """
+        Search the shards of the time range with up to max_factories
+        concurrent searches, and yield their files in shard order.
+        """
+        bounds = _shard_bounds(start_time, end_time, shards)
+        # Searches of later shards stop once their queue is full, until the
+        # earlier shards were read.
+        queues: List["queue.Queue[Any]"] = [
+            queue.Queue(SHARD_QUEUE_PAGES) for _ in bounds
+        ]
+        stop = threading.Event()
+
+        def search(index: int, shard_start: datetime, shard_end: datetime):
+            def put(item: Any) -> bool:
+                while not stop.is_set():
+                    try:
+                        queues[index].put(item, timeout=_SHARD_POLL)
+                        return True
+                    except queue.Full:
+                        continue
+                return False
+
+            if stop.is_set():
+                return
+            pages = self._find_file_pages(
+                shard_start,
+                shard_end,
+                sizer=PageSizer(count, max_count),
+                **conditions,
+            )
+            try:
+                for content in pages:
+                    if not put(parse_media_files(content)):
+                        return
+            except Exception as error:
+                put(error)
+                return
+            finally:
+                pages.close()
+            put(None)
+
+        with ThreadPoolExecutor(max_workers=max_factories) as executor:
+            try:
+                for index, (shard_start, shard_end) in enumerate(bounds):
+                    executor.submit(search, index, shard_start, shard_end)
+
+                # Files overlapping the end of a shard are also found by the
+                # next shards.
+                previous: Set[str] = set()
+                for index, (_, shard_end) in enumerate(bounds):
+                    current = set()
+                    while True:
+                        item = queues[index].get()
+                        if item is None:
+                            break
+                        if isinstance(item, Exception):
+                            raise item
+                        for media_file in item:
+                            file_path = media_file.file_path
+                            if media_file.end_time >= shard_end:
+                                current.add(file_path)
+                            if file_path not in previous:
+                                yield media_file
+                    previous = current
+            finally:
+                stop.set()
 
     def download_file(
         self,
@@ -208,6 +580,248 @@ class Media(Http):
         )
         return ret.content
 
+    def download_file_to(
+        self,
+        file_path: str,
+        dest: DestT,
+        *,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+        progress: Optional[ProgressT] = None,
+        resume: bool = True,
+        retries: Optional[int] = None,
+        timeout: TimeoutT = None,
+    ) -> int:
+        """
+        Download a recorded file to disk without keeping it in memory.
+
+        file_path: File location like returned by FilePath from find_files()
+        dest:      Path or binary file object to write to
+        progress:  Called with the bytes written so far and the total size,
+                   if known, after each chunk
+        resume:    Continue a partial download already at dest, if it is a
+                   path, and continue interrupted transfers up to retries
+                   times, with a Range request. Firmwares that ignore the
+                   range send the whole file again.
+        timeout:   Use default if None
+
+        Returns the size of the file. Raises CommError if the download did
+        not get the size announced by the camera.
+        """
+        if retries is None:
+            retries = self._retries_default
+        with _open_dest(dest, resume) as (fileobj, offset):
+            start = fileobj.tell() - offset
+            total: Optional[int] = None
+            for attempt in range(retries + 1):
+                headers = {"Range": f"bytes={offset}-"} if offset else None
+                try:
+                    ret = self.command(
+                        "RPC_Loadfile/{0}".format(file_path),
+                        timeout_cmd=timeout,
+                        stream=True,
+                        headers=headers,
+                    )
+                except CommError as error:
+                    total = _complete_size(error, offset)
+                    if total is None:
+                        raise
+                    break
+                try:
+                    if offset and ret.status_code != 206:
+                        _restart(fileobj, start)
+                        offset = 0
+                    total = _total_size(ret.headers, offset)
+                    for chunk in ret.iter_content(chunk_size):
+                        fileobj.write(chunk)
+                        offset += len(chunk)
+                        if progress is not None:
+                            progress(offset, total)
+                except RequestException as error:
+                    _LOGGER.debug(
+                        "%s Download of %s failed at %i bytes: %r",
+                        self,
+                        file_path,
+                        offset,
+                        error,
+                    )
+                    if not resume or attempt == retries:
+                        raise CommError(error) from error
+                    continue
+                finally:
+                    ret.close()
+                break
+        return _check_size(file_path, offset, total)
+
+    async def async_download_file_to(
+        self,
+        file_path: str,
+        dest: DestT,
+        *,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+        progress: Optional[ProgressT] = None,
+        resume: bool = True,
+        retries: Optional[int] = None,
+        timeout: TimeoutT = None,
+    ) -> int:
+        """
+        Download a recorded file to disk, see download_file_to. Writes to
+        dest run in the default executor, not to block the event loop.
+        """
+        if retries is None:
+            retries = self._retries_default
+        loop = asyncio.get_running_loop()
+        with _open_dest(dest, resume) as (fileobj, offset):
+            start = fileobj.tell() - offset
+            total: Optional[int] = None
+            for attempt in range(retries + 1):
+                headers = {"Range": f"bytes={offset}-"} if offset else None
+                try:
+                    async with self.async_stream_command(
+                        "RPC_Loadfile/{0}".format(file_path),
+                        timeout_cmd=timeout,
+                        headers=headers,
+                    ) as ret:
+                        if offset and ret.status_code != 206:
+                            await loop.run_in_executor(
+                                None, _restart, fileobj, start
+                            )
+                            offset = 0
+                        total = _total_size(ret.headers, offset)
+                        async for chunk in ret.aiter_bytes(chunk_size):
+                            await loop.run_in_executor(
+                                None, fileobj.write, chunk
+                            )
+                            offset += len(chunk)
+                            if progress is not None:
+                                progress(offset, total)
+                except (CommError, ReadTimeoutError) as error:
+                    total = _complete_size(error, offset)
+                    if total is not None:
+                        break
+                    _LOGGER.debug(
+                        "%s Download of %s failed at %i bytes: %r",
+                        self,
+                        file_path,
+                        offset,
+                        error,
+                    )
+                    if not resume or attempt == retries:
+                        raise
+                    continue
+                break
+        return _check_size(file_path, offset, total)
+
+    def export_files(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        dest_dir: str,
+        *,
+        channel: int = 0,
+        directories: Sequence[str] = (),
+        types: Sequence[str] = (),
+        flags: Sequence[str] = (),
+        events: Sequence[str] = (),
+        stream: Optional[str] = None,
+        layout: LayoutT = default_layout,
+        manifest: Optional[str] = None,
+        max_workers: int = EXPORT_MAX_WORKERS,
+        progress: Optional[Callable[[ExportStats], None]] = None,
+    ) -> ExportStats:
+        """
+        Download the files found by find_files() into dest_dir.
+
+        Files are downloaded by max_workers threads while the next pages of
+        the search are fetched.
+
+        layout:   Called with the FilePath of each file, returns the path to
+                  write it to, relative to dest_dir
+        manifest: JSON lines file of the files exported, defaults to
+                  manifest.jsonl in dest_dir. Files in it that are still in
+                  dest_dir are skipped.
+        progress: Called with the stats after each file
+
+        Files that fail to download are logged, counted and left as .part
+        files, to be continued on the next run.
+        """
+        exported = Manifest(
+            manifest or os.path.join(dest_dir, MANIFEST_NAME), dest_dir
+        )
+        lock = threading.Lock()
+        counts = {"files": 0, "skipped": 0, "failed": 0, "bytes": 0}
+        started = time.monotonic()
+        # Do not read further pages while enough files are waiting.
+        slots = threading.BoundedSemaphore(max_workers * 2)
+
+        def stats() -> ExportStats:
+            with lock:
+                return ExportStats(
+                    seconds=time.monotonic() - started, **counts
+                )
+
+        def export(file_path: str, dest: str) -> None:
+            target = os.path.join(dest_dir, dest)
+            part = target + ".part"
+            try:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                resumed = os.path.getsize(part) if os.path.exists(part) else 0
+                size = self.download_file_to(file_path, part)
+                os.replace(part, target)
+                exported.add(file_path, dest, size)
+            except (CommError, LoginError, OSError) as error:
+                _LOGGER.warning(
+                    "%s Export of %s failed: %r", self, file_path, error
+                )
+                with lock:
+                    counts["failed"] += 1
+            else:
+                with lock:
+                    counts["files"] += 1
+                    counts["bytes"] += max(0, size - resumed)
+            finally:
+                slots.release()
+            if progress is not None:
+                progress(stats())
+
+        pending: List["Future[None]"] = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for media_file in self.find_files(
+                start_time,
+                end_time,
+                channel=channel,
+                directories=directories,
+                types=types,
+                flags=flags,
+                events=events,
+                stream=stream,
+                records=True,
+            ):
+                file_path = media_file.file_path
+                dest = layout(file_path)
+                if exported.is_done(file_path, dest):
+                    with lock:
+                        counts["skipped"] += 1
+                    continue
+                slots.acquire()
+                pending.append(executor.submit(export, file_path, dest))
+                # Raise unexpected errors of the exports, e.g. of progress,
+                # without keeping the futures of all the files.
+                for future in [future for future in pending if future.done()]:
+                    pending.remove(future)
+                    future.result()
+        for future in pending:
+            future.result()
+
+        result = stats()
+        _LOGGER.debug(
+            "%s Exported %i files, %i bytes at %.0f B/s",
+            self,
+            result.files,
+            result.bytes,
+            result.throughput,
+        )
+        return result
+
     def download_time(
         self,
         start_time: datetime,
@@ -0,0 +1,240 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 2 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# vim:sw=4:ts=4:et
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Iterable, List, Optional, Tuple
+
+from .media import Media, MediaFile, parse_media_files
+from .utils import DATEFMT
+
+_LOGGER = logging.getLogger(__name__)
+
+# Start of the first search of a camera that is not indexed yet.
+_EPOCH = datetime(2000, 1, 1)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    camera TEXT NOT NULL,
+    channel INTEGER NOT NULL,
+    file_path TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    duration INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    events TEXT NOT NULL,
+    flags TEXT NOT NULL,
+    PRIMARY KEY (camera, channel, file_path)
+);
+CREATE INDEX IF NOT EXISTS files_start ON files (camera, channel, start_time);
+CREATE INDEX IF NOT EXISTS files_end ON files (camera, channel, end_time);
+"""
+
+_COLUMNS = (
+    "channel, file_path, start_time, end_time, length, duration, type, "
+    "events, flags"
+)
+
+
+def _to_row(
+    camera: str, channel: int, media_file: MediaFile
+) -> Tuple[Any, ...]:
+    return (
+        camera,
+        channel,
+        media_file.file_path,
+        media_file.start_time.strftime(DATEFMT),
+        media_file.end_time.strftime(DATEFMT),
+        media_file.length,
+        media_file.duration,
+        media_file.type,
+        ",".join(media_file.events),
+        ",".join(media_file.flags),
+    )
+
+
+def _from_row(row: Tuple[Any, ...]) -> MediaFile:
+    events, flags = row[7], row[8]
+    return MediaFile(
+        channel=row[0],
+        file_path=row[1],
+        start_time=datetime.strptime(row[2], DATEFMT),
+        end_time=datetime.strptime(row[3], DATEFMT),
+        length=row[4],
+        duration=row[5],
+        type=row[6],
+        events=tuple(events.split(",")) if events else (),
+        flags=tuple(flags.split(",")) if flags else (),
+    )
+
+
+class RecordingIndex:
+    """
+    SQLite index of the recorded files of cameras, to answer timeline
+    queries without searching the cameras.
+
+        index = RecordingIndex("recordings.db")
+        index.refresh(camera, "door")
+        index.files("door", start, end)
+
+    Cameras are identified by a name chosen by the caller, the host of the
+    camera by default.
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "RecordingIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def last_end_time(self, name: str, channel: int = 0) -> Optional[datetime]:
+        """Return the end of the last indexed file."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT MAX(end_time) FROM files"
+                " WHERE camera = ? AND channel = ?",
+                (name, channel),
+            ).fetchone()
+        if row[0] is None:
+            return None
+        return datetime.strptime(row[0], DATEFMT)
+
+    def add(
+        self, name: str, channel: int, media_files: Iterable[MediaFile]
+    ) -> int:
+        """Add or update files, return how many there were."""
+        rows = [
+            _to_row(name, channel, media_file) for media_file in media_files
+        ]
+        with self._lock, self._db:
+            self._db.executemany(
+                f"INSERT OR REPLACE INTO files (camera, {_COLUMNS})"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def prune(self, name: str, channel: int, oldest: datetime) -> int:
+        """Drop the files starting before oldest, return how many."""
+        with self._lock, self._db:
+            return self._db.execute(
+                "DELETE FROM files"
+                " WHERE camera = ? AND channel = ? AND start_time < ?",
+                (name, channel, oldest.strftime(DATEFMT)),
+            ).rowcount
+
+    def refresh(
+        self,
+        camera: Media,
+        name: Optional[str] = None,
+        channel: int = 0,
+        *,
+        end_time: Optional[datetime] = None,
+        prune: bool = True,
+        **find_kwargs,
+    ) -> int:
+        """
+        Index the files recorded since the end of the last indexed file,
+        and drop the files the camera overwrote. Return the number of files
+        found.
+
+        find_kwargs are passed to find_files(), e.g. types=["mp4"] or
+        max_count=1000.
+        """
+        if name is None:
+            name = camera._host
+        if end_time is None:
+            end_time = datetime.now().replace(microsecond=0)
+        last = self.last_end_time(name, channel)
+
+        # The last file may have been still recording, search it again.
+        found = 0
+        batch: List[MediaFile] = []
+        for media_file in camera.find_files(
+            last or _EPOCH,
+            end_time,
+            channel,
+            records=True,
+            **find_kwargs,
+        ):
+            batch.append(media_file)
+            if len(batch) >= 1000:
+                found += self.add(name, channel, batch)
+                batch.clear()
+        found += self.add(name, channel, batch)
+        _LOGGER.debug("%s Indexed %i files of %s", camera, found, name)
+
+        if prune and last is not None:
+            # Nothing found may be a failed search, keep the index then.
+            oldest = self._oldest(camera, name, channel, end_time)
+            if oldest is not None:
+                self.prune(name, channel, oldest)
+        return found
+
+    def _oldest(
+        self, camera: Media, name: str, channel: int, end_time: datetime
+    ) -> Optional[datetime]:
+        """Return when the oldest file still on the camera starts."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT MIN(start_time) FROM files"
+                " WHERE camera = ? AND channel = ?",
+                (name, channel),
+            ).fetchone()
+        start = datetime.strptime(row[0], DATEFMT) if row[0] else _EPOCH
+        pages = camera.find_files(start, end_time, channel, count=1)
+        try:
+            first = next(
+                (
+                    media_file
+                    for content in pages
+                    for media_file in parse_media_files(content)
+                ),
+                None,
+            )
+        finally:
+            # Release the search without reading the other pages.
+            pages.close()
+        return first.start_time if first is not None else None
+
+    def files(
+        self,
+        name: str,
+        start_time: datetime,
+        end_time: datetime,
+        channel: int = 0,
+    ) -> List[MediaFile]:
+        """Return the indexed files overlapping a time range, in order."""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT {_COLUMNS} FROM files"
+                " WHERE camera = ? AND channel = ?"
+                " AND start_time < ? AND end_time > ?"
+                " ORDER BY start_time",
+                (
+                    name,
+                    channel,
+                    end_time.strftime(DATEFMT),
+                    start_time.strftime(DATEFMT),
+                ),
+            ).fetchall()
+        return [_from_row(row) for row in rows]
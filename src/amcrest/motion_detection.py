@@ -10,7 +10,8 @@
 # vim:sw=4:ts=4:et
 
 from amcrest.http import Http
-from amcrest.utils import pretty, str2bool
+from amcrest.table import parse_config
+from amcrest.utils import str2bool
 
 
 class MotionDetection(Http):
@@ -31,30 +32,24 @@ class MotionDetection(Http):
         return await self._async_get_config("MotionDetect")
 
     def is_motion_detector_on(self, *, channel: int = 0) -> bool:
-        ret = self.motion_detection
-        status = [pretty(s) for s in ret.split() if ".Enable=" in s][channel]
-        return str2bool(status)
+        table = parse_config(self.motion_detection)
+        return str2bool(table.column("MotionDetect", "Enable")[channel])
 
     async def async_is_motion_detector_on(self, *, channel: int = 0) -> bool:
-        ret = await self.async_motion_detection
-        status = [pretty(s) for s in ret.split() if ".Enable=" in s][channel]
-        return str2bool(status)
+        table = parse_config(await self.async_motion_detection)
+        return str2bool(table.column("MotionDetect", "Enable")[channel])
 
     def is_record_on_motion_detection(self, *, channel: int = 0) -> bool:
-        ret = self.motion_detection
-        status = [pretty(s) for s in ret.split() if ".RecordEnable=" in s][
-            channel
-        ]
-        return str2bool(status)
+        table = parse_config(self.motion_detection)
+        status = table.column("MotionDetect", "EventHandler.RecordEnable")
+        return str2bool(status[channel])
 
     async def async_is_record_on_motion_detection(
         self, *, channel: int = 0
     ) -> bool:
-        ret = await self.async_motion_detection
-        status = [pretty(s) for s in ret.split() if ".RecordEnable=" in s][
-            channel
-        ]
-        return str2bool(status)
+        table = parse_config(await self.async_motion_detection)
+        status = table.column("MotionDetect", "EventHandler.RecordEnable")
+        return str2bool(status[channel])
 
     def set_motion_detection(self, opt: bool, *, channel: int = 0) -> bool:
         value = "true" if opt else "false"
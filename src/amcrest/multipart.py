@@ -0,0 +1,175 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 2 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# vim:sw=4:ts=4:et
+import logging
+import time
+from typing import Iterator, List, NamedTuple, Optional
+
+import requests
+
+_LOGGER = logging.getLogger(__name__)
+
+# Size of the reads from a streamed response. A read returns what has
+# already been received, so this only bounds the size of one chunk.
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Consumed bytes are dropped from the buffer once there are that many.
+_COMPACT_SIZE = 64 * 1024
+
+
+class StreamBuffer:
+    """
+    Buffer of a multipart stream, read back as CRLF terminated lines or
+    blocks of a given size.
+
+    Data is fed in chunks of any size, readline() and read() return None
+    until enough data was fed.
+    """
+
+    __slots__ = ("_data", "_pos")
+
+    def __init__(self) -> None:
+        self._data = bytearray()
+        self._pos = 0
+
+    def __len__(self) -> int:
+        return len(self._data) - self._pos
+
+    def feed(self, data: bytes) -> None:
+        start = self._pos
+        if start >= _COMPACT_SIZE or start == len(self._data):
+            del self._data[:start]
+            self._pos = 0
+        self._data += data
+
+    def readline(self) -> Optional[bytes]:
+        """Return the next line without its CRLF."""
+        start = self._pos
+        end = self._data.find(b"\r\n", start)
+        if end < 0:
+            return None
+        line = bytes(self._data[start:end])
+        self._pos = end + 2
+        return line
+
+    def read(self, size: int) -> Optional[bytes]:
+        """Return the next size bytes."""
+        if len(self) < size:
+            return None
+        start = self._pos
+        end = start + size
+        data = bytes(self._data[start:end])
+        self._pos = end
+        return data
+
+    def skip(self, size: int) -> bool:
+        """Drop the next size bytes without copying them."""
+        if len(self) < size:
+            return False
+        self._pos += size
+        return True
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._pos = 0
+
+
+class MJPEGFrame(NamedTuple):
+    # Position of the frame in the stream, counting skipped frames.
+    number: int
+    # time.time() when the headers of the frame were received.
+    time: float
+    data: bytes
+
+
+class MJPEGParser:
+    """
+    Split a multipart/x-mixed-replace stream of JPEG images into frames,
+    using the Content-Length header of each part.
+
+    Only every Nth frame, and at most max_fps frames per second, are kept.
+    The other frames are dropped from the buffer without being copied.
+    """
+
+    def __init__(self, every: int = 1, max_fps: Optional[float] = None):
+        if every < 1:
+            raise ValueError(f"every must be at least 1, not {every}")
+        self.every = every
+        self.interval = 1 / max_fps if max_fps else 0.0
+        self._buffer = StreamBuffer()
+        self._number = -1
+        self._length: Optional[int] = None
+        self._in_body = False
+        self._keep = False
+        self._time = 0.0
+        self._last: Optional[float] = None
+
+    def _start_frame(self) -> None:
+        self._in_body = True
+        self._number += 1
+        now = time.monotonic()
+        self._keep = self._number % self.every == 0 and (
+            self._last is None or now - self._last >= self.interval
+        )
+        if self._keep:
+            self._last = now
+            self._time = time.time()
+
+    def feed(self, data: bytes) -> List[MJPEGFrame]:
+        """Return the frames completed by data."""
+        buffer = self._buffer
+        buffer.feed(data)
+        frames = []
+        while True:
+            if self._in_body:
+                length = self._length or 0
+                if not self._keep:
+                    if not buffer.skip(length):
+                        break
+                else:
+                    body = buffer.read(length)
+                    if body is None:
+                        break
+                    frames.append(MJPEGFrame(self._number, self._time, body))
+                self._in_body = False
+                self._length = None
+                continue
+
+            line = buffer.readline()
+            if line is None:
+                break
+            if line.startswith(b"--"):
+                self._length = None
+            elif not line:
+                if self._length is not None:
+                    self._start_frame()
+            elif line[:15].lower() == b"content-length:":
+                try:
+                    self._length = int(line[15:])
+                except ValueError:
+                    _LOGGER.debug("Bad MJPEG part header: %r", line)
+        return frames
+
+
+def iter_chunks(
+    ret: requests.Response, chunk_size: int = STREAM_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Yield the body of a streamed response as soon as it is received."""
+    read1 = getattr(ret.raw, "read1", None)
+    if read1 is None:
+        # Before urllib3 2, read() waits for chunk_size bytes, which would
+        # hold back events until that many were sent.
+        yield from ret.iter_content(chunk_size=1)
+        return
+    while True:
+        chunk = read1(chunk_size)
+        if not chunk:
+            return
+        yield chunk
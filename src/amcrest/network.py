@@ -8,11 +8,13 @@
 # GNU General Public License for more details.
 #
 # vim:sw=4:ts=4:et
-import socket
-import threading
-from contextlib import closing
-from typing import List, Optional
+import asyncio
+import ipaddress
+from typing import AsyncIterator, List, Optional
 
+import httpx
+
+from .config import SCAN_CONCURRENCY, SCAN_TIMEOUT
 from .http import Http
 
 
@@ -22,22 +24,107 @@ class Network(Http):
     __RTSP_PORT = 554
     __PWGPSI_PORT = 3800
 
-    def __raw_scan(self, ipaddr: str, timeout: Optional[float] = None) -> None:
-        if timeout:
-            socket.setdefaulttimeout(timeout)
-        else:
-            # If devices not found, try increasing timeout
-            socket.setdefaulttimeout(0.2)
+    async def __async_port_open(
+        self, ipaddr: str, port: int, timeout: float
+    ) -> bool:
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(ipaddr, port), timeout
+            )
+        except (OSError, asyncio.TimeoutError):
+            return False
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+        return True
+
+    async def __async_probe(self, ipaddr: str, timeout: float) -> bool:
+        """Check the device answers like a camera to getMachineName."""
+        url = f"{self._protocol}://{ipaddr}/cgi-bin/"
+        try:
+            resp = await self._get_async_client().get(
+                url + "magicBox.cgi?action=getMachineName", timeout=timeout
+            )
+        except httpx.HTTPError:
+            return False
+        return resp.status_code in (200, 401)
+
+    async def __async_raw_scan(
+        self, ipaddr: str, timeout: float, verify: bool
+    ) -> bool:
+        rtsp, pwgpsi = await asyncio.gather(
+            self.__async_port_open(ipaddr, self.__RTSP_PORT, timeout),
+            self.__async_port_open(ipaddr, self.__PWGPSI_PORT, timeout),
+        )
+        if not (rtsp and pwgpsi):
+            return False
+        if verify:
+            return await self.__async_probe(ipaddr, timeout)
+        return True
+
+    async def async_scan_devices(
+        self,
+        subnet: str,
+        timeout: Optional[float] = None,
+        *,
+        concurrency: int = SCAN_CONCURRENCY,
+        verify: bool = False,
+    ) -> AsyncIterator[str]:
+        """
+        Scan cameras in a range of ips, yielding their ips as they are
+        found. The iteration ends once all ips were checked.
 
-        with closing(socket.socket()) as sock:
-            try:
-                sock.connect((ipaddr, self.__RTSP_PORT))
-                sock.connect((ipaddr, self.__PWGPSI_PORT))
-                self.amcrest_ips.append(ipaddr)
+        Params:
+        subnet - subnet, i.e: 192.168.1.0/24
+                 if mask not used, assuming mask 24
 
-            # pylint: disable=bare-except
-            except:
-                pass
+        timeout - timeout in sec to connect to each port
+
+        concurrency - maximum number of ips checked at the same time
+
+        verify - also check each device found answers getMachineName
+        """
+        if "/" not in subnet:
+            subnet += "/24"
+        try:
+            network = ipaddress.ip_network(subnet, strict=False)
+        except ValueError as error:
+            raise RuntimeError("Cannot determine the subnet mask!") from error
+        if timeout is None:
+            timeout = SCAN_TIMEOUT
+
+        ipaddrs = iter(network.hosts())
+        found: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+
+        async def worker() -> None:
+            try:
+                for ipaddr in ipaddrs:
+                    if await self.__async_raw_scan(
+                        str(ipaddr), timeout, verify
+                    ):
+                        await found.put(str(ipaddr))
+            finally:
+                await found.put(None)
+
+        workers = [
+            asyncio.ensure_future(worker())
+            for _ in range(min(concurrency, network.num_addresses))
+        ]
+        try:
+            running = len(workers)
+            while running:
+                ipaddr = await found.get()
+                if ipaddr is None:
+                    running -= 1
+                else:
+                    yield ipaddr
+            # Raise the errors of the workers, if any.
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
 
     def scan_devices(
         self, subnet: str, timeout: Optional[float] = None
@@ -51,64 +138,22 @@ class Network(Http):
 
         timeout - timeout in sec
 
-        Returns:
+        Returns the ips of the cameras found, also kept in amcrest_ips.
+        Cannot be called from a running event loop, use async_scan_devices.
         """
 
-        # Maximum range from mask
-        # Format is mask: max_range
-        max_range = {
-            16: 256,
-            24: 256,
-            25: 128,
-            27: 32,
-            28: 16,
-            29: 8,
-            30: 4,
-            31: 2,
-        }
-
-        # If user didn't provide mask, use /24
-        if "/" not in subnet:
-            mask = int(24)
-            network = subnet
-        else:
-            network, mask_str = subnet.split("/")
-            mask = int(mask_str)
-
-        if mask not in max_range:
-            raise RuntimeError("Cannot determine the subnet mask!")
-
-        # Default logic is remove everything from last "." to the end
-        # This logic change in case mask is 16
-        network = network.rpartition(".")[0]
-
-        if mask == 16:
-            # For mask 16, we must cut the last two
-            # entries with .
-
-            # pylint: disable=unused-variable
-            for i in range(0, 1):
-                network = network.rpartition(".")[0]
-
-        # Trigger the scan
-        # For clear coding, let's keep the logic in if/else (mask16)
-        # instead of only one if
-        if mask == 16:
-            for seq1 in range(max_range[mask]):
-                for seq2 in range(max_range[mask]):
-                    ipaddr = f"{network}.{seq1}.{seq2}"
-                    thd = threading.Thread(
-                        target=self.__raw_scan, args=(ipaddr, timeout)
+        async def scan() -> List[str]:
+            try:
+                return [
+                    ipaddr
+                    async for ipaddr in self.async_scan_devices(
+                        subnet, timeout
                     )
-                    thd.start()
-        else:
-            for seq1 in range(max_range[mask]):
-                ipaddr = f"{network}.{seq1}"
-                thd = threading.Thread(
-                    target=self.__raw_scan, args=(ipaddr, timeout)
-                )
-                thd.start()
+                ]
+            finally:
+                await self.async_close()
 
+        self.amcrest_ips = asyncio.run(scan())
         return self.amcrest_ips
 
     @property
@@ -0,0 +1,108 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 2 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# vim:sw=4:ts=4:et
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+import httpx
+import requests
+
+from .config import PAGE_MIN_COUNT, PAGE_TARGET_SECONDS
+from .exceptions import AmcrestError, CommError, ReadTimeoutError
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def is_timeout(error: AmcrestError) -> bool:
+    """Check a CommError was caused by a timeout."""
+    return isinstance(error, ReadTimeoutError) or isinstance(
+        error.__cause__, (requests.Timeout, httpx.TimeoutException)
+    )
+
+
+class PageSizer:
+    """
+    Number of entries to ask for in each page of a search.
+
+    The count doubles, up to max_count, while pages are answered quickly,
+    and halves back towards the initial count when they are slow. Pages
+    only get smaller than the initial count, down to min_count, when they
+    time out. Without max_count pages never grow.
+    """
+
+    def __init__(
+        self,
+        count: int = 100,
+        max_count: Optional[int] = None,
+        *,
+        min_count: int = PAGE_MIN_COUNT,
+        target: float = PAGE_TARGET_SECONDS,
+    ) -> None:
+        self.count = count
+        self.initial_count = count
+        self.max_count = count if max_count is None else max_count
+        self.min_count = min(min_count, count)
+        self.target = target
+
+    def update(self, seconds: float) -> None:
+        """Resize after a page was answered in seconds."""
+        if seconds > self.target and self.count > self.initial_count:
+            self.count = max(self.initial_count, self.count // 2)
+            _LOGGER.debug("Page size shrunk to %i", self.count)
+        elif seconds < self.target / 2 and self.count < self.max_count:
+            self.count = min(self.max_count, self.count * 2)
+            _LOGGER.debug("Page size grown to %i", self.count)
+
+    def shrink(self) -> bool:
+        """
+        Halve the count after a timeout, return False if it was already the
+        minimum.
+        """
+        if self.count <= self.min_count:
+            return False
+        self.count = max(self.min_count, self.count // 2)
+        _LOGGER.debug("Page size shrunk to %i", self.count)
+        return True
+
+    def fetch(self, fetch_page: Callable[[int], str]) -> str:
+        """
+        Return fetch_page(count), asking again for a smaller page if the
+        request timed out.
+
+        fetch_page should not retry itself, so pages shrink after the first
+        timeout. The camera may have moved the search forward while
+        answering a page that timed out: the entries of that page are then
+        missing from the results.
+        """
+        while True:
+            started = time.monotonic()
+            try:
+                content = fetch_page(self.count)
+            except (CommError, ReadTimeoutError) as error:
+                if is_timeout(error) and self.shrink():
+                    continue
+                raise
+            self.update(time.monotonic() - started)
+            return content
+
+    async def async_fetch(
+        self, fetch_page: Callable[[int], Awaitable[str]]
+    ) -> str:
+        while True:
+            started = time.monotonic()
+            try:
+                content = await fetch_page(self.count)
+            except (CommError, ReadTimeoutError) as error:
+                if is_timeout(error) and self.shrink():
+                    continue
+                raise
+            self.update(time.monotonic() - started)
+            return content
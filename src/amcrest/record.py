@@ -11,7 +11,7 @@
 
 from amcrest.exceptions import CommError
 from amcrest.http import Http
-from amcrest.utils import pretty
+from amcrest.table import parse_config
 
 
 class Record(Http):
@@ -117,13 +117,11 @@ class Record(Http):
     def _process_record_mode(self, record_mode: str, channel: int) -> str:
         status_code = {0: "Automatic", 1: "Manual", 2: "Stop"}
 
-        statuses = [
-            pretty(s) for s in record_mode.split() if f"[{channel}].Mode=" in s
-        ]
-        if len(statuses) != 1:
+        mode = parse_config(record_mode).get(f"RecordMode[{channel}].Mode")
+        if mode is None:
             return "Unknown"
 
-        status = int(statuses[0])
+        status = int(mode)
         if status not in status_code:
             return "Unknown"
 
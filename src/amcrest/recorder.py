@@ -0,0 +1,138 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 2 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# vim:sw=4:ts=4:et
+import logging
+import os
+import time
+from datetime import datetime
+from typing import BinaryIO, Callable, List, Optional
+
+from .config import RECORD_BUFFER_SIZE
+
+_LOGGER = logging.getLogger(__name__)
+
+SegmentCallbackT = Callable[[str], None]
+
+
+class SegmentWriter:
+    """
+    Write a stream into segment files, starting a new one when the current
+    one is segment_seconds old or segment_bytes long.
+
+    path_pattern is formatted with the number of the segment and the time
+    it started, e.g. "door/{start:%Y%m%d-%H%M%S}-{index}.dav". It must use
+    {index}, or {start} with microseconds (%f), so that segments get
+    distinct paths. Existing files are never overwritten.
+
+    Writes go through a buffer of buffer_size bytes, and each segment is
+    flushed and fsynced before the next one starts, then given to
+    on_segment. Segments are cut at byte boundaries, not at frames.
+    """
+
+    def __init__(
+        self,
+        path_pattern: str,
+        *,
+        segment_seconds: Optional[float] = None,
+        segment_bytes: Optional[int] = None,
+        buffer_size: int = RECORD_BUFFER_SIZE,
+        on_segment: Optional[SegmentCallbackT] = None,
+    ) -> None:
+        if segment_bytes is not None and segment_bytes <= 0:
+            raise ValueError(
+                f"segment_bytes must be positive, not {segment_bytes}"
+            )
+        if "{index" not in path_pattern and not (
+            "{start" in path_pattern and "%f" in path_pattern
+        ):
+            raise ValueError(
+                "path_pattern needs {index} or {start} with %f to name each "
+                f"segment differently: {path_pattern!r}"
+            )
+        self.path_pattern = path_pattern
+        self.segment_seconds = segment_seconds
+        self.segment_bytes = segment_bytes
+        self.buffer_size = buffer_size
+        self.on_segment = on_segment
+        self.paths: List[str] = []
+        self._file: Optional[BinaryIO] = None
+        self._size = 0
+        self._started = 0.0
+
+    def __enter__(self) -> "SegmentWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _open(self) -> BinaryIO:
+        path = self.path_pattern.format(
+            index=len(self.paths), start=datetime.now()
+        )
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            segment = open(path, "xb", buffering=self.buffer_size)
+        except FileExistsError as error:
+            raise FileExistsError(
+                f"Segment {path} already exists, not overwriting it"
+            ) from error
+        self.paths.append(path)
+        self._size = 0
+        self._started = time.monotonic()
+        _LOGGER.debug("Recording segment %s", path)
+        return segment
+
+    def _space(self) -> Optional[int]:
+        """Return how many bytes fit in the current segment."""
+        if (
+            self.segment_seconds is not None
+            and time.monotonic() - self._started >= self.segment_seconds
+        ):
+            return 0
+        if self.segment_bytes is None:
+            return None
+        return self.segment_bytes - self._size
+
+    def write(self, data: bytes) -> None:
+        view = memoryview(data)
+        while view:
+            segment = self._file
+            if segment is not None:
+                space = self._space()
+                if space is not None and space <= 0:
+                    self._close_segment()
+                    segment = None
+            if segment is None:
+                segment = self._file = self._open()
+                space = self.segment_bytes
+            if space is not None and len(view) > space:
+                written, view = view[:space], view[space:]
+            else:
+                written, view = view, view[:0]
+            segment.write(written)
+            self._size += len(written)
+
+    def _close_segment(self) -> None:
+        segment, self._file = self._file, None
+        if segment is None:
+            return
+        try:
+            segment.flush()
+            os.fsync(segment.fileno())
+        finally:
+            segment.close()
+        if self.on_segment is not None:
+            self.on_segment(self.paths[-1])
+
+    def close(self) -> None:
+        """Finish the current segment."""
+        self._close_segment()
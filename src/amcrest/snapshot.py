@@ -10,17 +10,33 @@
 # vim:sw=4:ts=4:et
 import logging
 import shutil
-from typing import Optional, Union, overload
+from typing import BinaryIO, Optional, Union, overload
 from typing_extensions import Literal
 
 from urllib3.exceptions import HTTPError
 from urllib3.response import HTTPResponse
 
+from .capture import SnapshotCapture
 from .exceptions import CommError
 from .http import Http, TimeoutT
 
 _LOGGER = logging.getLogger(__name__)
 
+BufferT = Union[bytearray, memoryview]
+
+
+def _snapshot_cmd(channel: Optional[int]) -> str:
+    if channel is None:
+        return "snapshot.cgi"
+    return f"snapshot.cgi?channel={channel}"
+
+
+def _check_length(length: Optional[str], size: int) -> None:
+    if length is not None and length.isdigit() and int(length) > size:
+        raise ValueError(
+            f"Snapshot of {length} bytes larger than the buffer ({size})"
+        )
+
 
 class Snapshot(Http):
     @property
@@ -78,10 +94,9 @@ class Snapshot(Http):
             raw from http request if stream is True
             response content if stream is False
         """
-        cmd = "snapshot.cgi"
-        if channel is not None:
-            cmd += f"?channel={channel}"
-        ret = self.command(cmd, timeout_cmd=timeout, stream=stream)
+        ret = self.command(
+            _snapshot_cmd(channel), timeout_cmd=timeout, stream=stream
+        )
 
         if path_file:
             with open(path_file, "wb") as out_file:
@@ -100,12 +115,99 @@ class Snapshot(Http):
 
         return ret.raw if stream else ret.content
 
+    def snapshot_into(
+        self,
+        buffer: BufferT,
+        *,
+        channel: Optional[int] = None,
+        timeout: TimeoutT = None,
+    ) -> int:
+        """
+        Read a snapshot into a preallocated buffer and return its size, so
+        capturing many frames does not allocate a new bytes object each.
+
+        Raise ValueError if the snapshot does not fit in the buffer.
+        """
+        view = memoryview(buffer).cast("B")
+        ret = self.command(
+            _snapshot_cmd(channel), timeout_cmd=timeout, stream=True
+        )
+        try:
+            _check_length(ret.headers.get("Content-Length"), len(view))
+            size = 0
+            while size < len(view):
+                read = ret.raw.readinto(view[size:])
+                if not read:
+                    return size
+                size += read
+            if ret.raw.read(1):
+                raise ValueError(
+                    f"Snapshot larger than the buffer ({len(view)})"
+                )
+            return size
+        except HTTPError as error:
+            _LOGGER.debug(
+                "%s Snapshot into buffer failed due to error: %s",
+                self,
+                repr(error),
+            )
+            raise CommError(error) from error
+        finally:
+            ret.close()
+
     async def async_snapshot(
         self, *, channel: Optional[int] = None, timeout: TimeoutT = None
     ) -> bytes:
-        cmd = "snapshot.cgi"
-        if channel is not None:
-            cmd += f"?channel={channel}"
-        ret = await self.async_command(cmd, timeout_cmd=timeout)
+        ret = await self.async_command(
+            _snapshot_cmd(channel), timeout_cmd=timeout
+        )
 
         return ret.content
+
+    async def async_snapshot_into(
+        self,
+        dest: Union[BufferT, BinaryIO],
+        *,
+        channel: Optional[int] = None,
+        timeout: TimeoutT = None,
+    ) -> int:
+        """
+        Stream a snapshot into a preallocated buffer, or write it to a binary
+        file, as it arrives. Return its size.
+
+        Raise ValueError if the snapshot does not fit in the buffer.
+        """
+        view = None
+        if isinstance(dest, (bytearray, memoryview)):
+            view = memoryview(dest).cast("B")
+        size = 0
+        async with self.async_stream_command(
+            _snapshot_cmd(channel), timeout_cmd=timeout
+        ) as ret:
+            if view is not None:
+                _check_length(ret.headers.get("Content-Length"), len(view))
+            async for chunk in ret.aiter_bytes():
+                end = size + len(chunk)
+                if view is None:
+                    dest.write(chunk)  # type: ignore[union-attr]
+                elif end > len(view):
+                    raise ValueError(
+                        f"Snapshot larger than the buffer ({len(view)})"
+                    )
+                else:
+                    view[size:end] = chunk
+                size = end
+        return size
+
+    def capture(
+        self,
+        fps: float,
+        *,
+        channel: Optional[int] = None,
+        timeout: TimeoutT = None,
+    ) -> SnapshotCapture:
+        """
+        Return a SnapshotCapture taking fps snapshots per second, see
+        SnapshotCapture.run() and SnapshotCapture.async_run().
+        """
+        return SnapshotCapture(self, fps, channel=channel, timeout=timeout)
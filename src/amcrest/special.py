@@ -10,13 +10,18 @@
 # vim:sw=4:ts=4:et
 import logging
 import shutil
+import time
 import urllib.parse
-from typing import Optional
+from typing import AsyncIterator, Iterator, List, Optional
 
+from requests import RequestException
 from urllib3.exceptions import HTTPError
 
 from .exceptions import CommError
-from .http import Http
+from .http import Http, TimeoutT
+from .multipart import MJPEGFrame, MJPEGParser, iter_chunks
+from .recorder import SegmentCallbackT, SegmentWriter
+from .table import parse_config
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -57,6 +62,81 @@ class Special(Http):
 
         return ret.raw
 
+    async def async_realtime_stream(
+        self,
+        *,
+        channel: int = 1,
+        typeno: int = 0,
+        chunk_size: Optional[int] = None,
+        timeout: TimeoutT = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield the realtime stream in chunks as they are received. The next
+        chunk is only read once the previous one was consumed.
+        """
+        async with self.async_stream_command(
+            f"realmonitor.cgi?action=getStream&channel={channel}&"
+            f"subtype={typeno}",
+            timeout_cmd=timeout,
+        ) as ret:
+            async for chunk in ret.aiter_bytes(chunk_size):
+                yield chunk
+
+    def record_realtime_stream(
+        self,
+        path_pattern: str,
+        *,
+        channel: int = 1,
+        typeno: int = 0,
+        segment_seconds: Optional[float] = None,
+        segment_bytes: Optional[int] = None,
+        duration: Optional[float] = None,
+        on_segment: Optional[SegmentCallbackT] = None,
+    ) -> List[str]:
+        """
+        Record the realtime stream into segment files, rotated every
+        segment_seconds or segment_bytes, see SegmentWriter for
+        path_pattern and on_segment.
+
+        Recording stops after duration seconds, or when the camera ends the
+        stream. Return the paths of the segments.
+
+        camera.record_realtime_stream(
+            "/videos/door-{start:%Y%m%d-%H%M%S}-{index}.dav",
+            segment_seconds=600)
+        """
+        ret = self.command(
+            f"realmonitor.cgi?action=getStream&channel={channel}&"
+            f"subtype={typeno}",
+            stream=True,
+        )
+        started = time.monotonic()
+        writer = SegmentWriter(
+            path_pattern,
+            segment_seconds=segment_seconds,
+            segment_bytes=segment_bytes,
+            on_segment=on_segment,
+        )
+        try:
+            with writer:
+                for chunk in iter_chunks(ret):
+                    writer.write(chunk)
+                    if (
+                        duration is not None
+                        and time.monotonic() - started >= duration
+                    ):
+                        break
+        except (RequestException, HTTPError) as error:
+            _LOGGER.debug(
+                "%s Realtime stream recording failed due to error: %s",
+                self,
+                repr(error),
+            )
+            raise CommError(error) from error
+        finally:
+            ret.close()
+        return writer.paths
+
     def rtsp_url(self, *, channel: int = 1, typeno: int = 0) -> str:
         """
         Return RTSP streaming url
@@ -85,16 +165,8 @@ class Special(Http):
     ) -> str:
         cmd = f"cam/realmonitor?channel={channel}&subtype={typeno}"
 
-        try:
-            port_num = [
-                x.split("=")[1]
-                for x in rtsp_config.split()
-                if x.startswith("table.RTSP.Port=")
-            ][0]
-        except IndexError:
-            port = ""
-        else:
-            port = ":{}".format(port_num)
+        port_num = parse_config(rtsp_config).get("RTSP.Port")
+        port = "" if port_num is None else ":{}".format(port_num)
 
         username = urllib.parse.quote(self._user, safe='')
         password = urllib.parse.quote(self._password, safe='')
@@ -140,10 +212,11 @@ class Special(Http):
                     1-Extra Stream 1 (Sub Stream)
                     2-Extra Stream 2 (Sub Stream)
         """
-        return (
-            f"{self._base_url}mjpg/video.cgi?"
-            f"channel={channel}&subtype={typeno}"
-        )
+        return f"{self._base_url}{self._mjpg_cmd(channel, typeno)}"
+
+    @staticmethod
+    def _mjpg_cmd(channel: int, typeno: int) -> str:
+        return f"mjpg/video.cgi?channel={channel}&subtype={typeno}"
 
     def mjpg_stream(
         self,
@@ -164,8 +237,7 @@ class Special(Http):
                     1-Extra Stream 1 (Sub Stream)
                     2-Extra Stream 2 (Sub Stream)
         """
-        cmd = self.mjpeg_url(channel=channel, typeno=typeno)
-        ret = self.command(cmd, stream=True)
+        ret = self.command(self._mjpg_cmd(channel, typeno), stream=True)
 
         if path_file:
             try:
@@ -180,3 +252,76 @@ class Special(Http):
                 raise CommError(error) from error
 
         return ret.raw
+
+    async def async_mjpg_stream(
+        self,
+        *,
+        channel: int = 1,
+        typeno: int = 0,
+        chunk_size: Optional[int] = None,
+        timeout: TimeoutT = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield the raw multipart MJPEG stream in chunks as they are received,
+        see async_mjpg_frames for the frames.
+        """
+        async with self.async_stream_command(
+            self._mjpg_cmd(channel, typeno), timeout_cmd=timeout
+        ) as ret:
+            async for chunk in ret.aiter_bytes(chunk_size):
+                yield chunk
+
+    def mjpg_frames(
+        self,
+        *,
+        channel: int = 1,
+        typeno: int = 0,
+        every: int = 1,
+        max_fps: Optional[float] = None,
+        timeout: TimeoutT = None,
+    ) -> Iterator[MJPEGFrame]:
+        """
+        Yield the JPEG frames of the MJPEG stream as MJPEGFrame tuples, see
+        mjpg_stream for channel and typeno.
+
+        Params:
+            every: only yield every Nth frame of the stream.
+
+            max_fps: yield at most that many frames per second.
+
+        Frames left out are skipped without being copied. The stream is
+        closed when the iterator is.
+        """
+        parser = MJPEGParser(every, max_fps)
+        ret = self.command(
+            self._mjpg_cmd(channel, typeno), timeout_cmd=timeout, stream=True
+        )
+        try:
+            for chunk in iter_chunks(ret):
+                yield from parser.feed(chunk)
+        except (RequestException, HTTPError) as error:
+            _LOGGER.debug(
+                "%s MJPEG stream failed due to error: %s",
+                self,
+                repr(error),
+            )
+            raise CommError(error) from error
+        finally:
+            ret.close()
+
+    async def async_mjpg_frames(
+        self,
+        *,
+        channel: int = 1,
+        typeno: int = 0,
+        every: int = 1,
+        max_fps: Optional[float] = None,
+        timeout: TimeoutT = None,
+    ) -> AsyncIterator[MJPEGFrame]:
+        parser = MJPEGParser(every, max_fps)
+        async with self.async_stream_command(
+            self._mjpg_cmd(channel, typeno), timeout_cmd=timeout
+        ) as ret:
+            async for chunk in ret.aiter_bytes():
+                for frame in parser.feed(chunk):
+                    yield frame
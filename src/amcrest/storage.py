@@ -9,15 +9,24 @@
 #
 # vim:sw=4:ts=4:et
 
-import re
 from typing import List, Optional, Tuple
 from typing_extensions import TypedDict
 
 from .http import Http
+from .table import parse_config
 from .utils import percent, to_unit
 
-_USED = ".UsedBytes"
-_TOTAL = ".TotalBytes"
+_USED = "UsedBytes"
+_TOTAL = "TotalBytes"
+
+
+def _first_number(values: List[str]) -> Optional[float]:
+    for value in values:
+        try:
+            return float(value)
+        except ValueError:
+            continue
+    return None
 
 
 class StorageT(TypedDict):
@@ -99,14 +108,8 @@ class Storage(Http):
         return self._build_storage_type(used, total)
 
     def _get_storage_values(self, info: str, *params) -> List[Optional[float]]:
-        ret: List[Optional[float]] = []
-        for param in params:
-            match = re.search(f".{param}=([0-9.]+)", info)
-            if match is None:
-                ret.append(None)
-            else:
-                ret.append(float(match.group(1)))
-        return ret
+        table = parse_config(info)
+        return [_first_number(table.values(param)) for param in params]
 
     def _build_storage_type(
         self, used: Optional[float], total: Optional[float]
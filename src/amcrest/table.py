@@ -0,0 +1,174 @@
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, version 2 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# vim:sw=4:ts=4:et
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+_REG_KEY_PART = re.compile(r"([^.\[\]]+)|\[(\d+)\]")
+
+
+class ConfigTable:
+    """
+    Parsed key=value response, such as the one of getConfig.
+
+    Keys look like table.MotionDetect[0].EventHandler.RecordEnable, the
+    leading "table." is dropped. Values are kept as strings.
+
+        table = ConfigTable(camera.motion_detection)
+        table.get("MotionDetect[0].Enable")
+        'true'
+        table.column("MotionDetect", "Enable")
+        ['true', 'false']
+        table.tree["MotionDetect"][0]["EventHandler"]["RecordEnable"]
+        'true'
+    """
+
+    __slots__ = ("index", "_lengths", "_leaves", "_tree")
+
+    def __init__(self, content: str) -> None:
+        # Flat index of the full keys, length of the arrays of the first
+        # level (e.g. one entry per channel) and values by last key part.
+        self.index: Dict[str, str] = {}
+        self._lengths: Dict[str, int] = {}
+        self._leaves: Dict[str, List[str]] = {}
+        self._tree: Optional[Dict[str, Any]] = None
+
+        for line in content.splitlines():
+            key, sep, value = line.partition("=")
+            if not sep:
+                continue
+            key = key.strip()
+            if key.startswith("table."):
+                key = key[6:]
+            value = value.strip()
+            self.index[key] = value
+
+            start = key.find("[")
+            if start > 0:
+                end = key.find("]", start)
+                try:
+                    length = int(key[start:end].lstrip("[")) + 1
+                except ValueError:
+                    pass
+                else:
+                    name = key[:start]
+                    if self._lengths.get(name, 0) < length:
+                        self._lengths[name] = length
+
+            self._leaves.setdefault(key.rpartition(".")[2], []).append(value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.index
+
+    def __getitem__(self, key: str) -> str:
+        return self.index[key]
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        return self.index.get(key, default)
+
+    def arrays(self) -> List[str]:
+        """Return the names with an index, such as 'MotionDetect'."""
+        return list(self._lengths)
+
+    def column(self, name: str, path: str) -> List[str]:
+        """
+        Return the value of path for each entry of the name array.
+
+        Entries without that path are skipped.
+        """
+        values = []
+        for i in range(self._lengths.get(name, 0)):
+            value = self.index.get(f"{name}[{i}].{path}")
+            if value is not None:
+                values.append(value)
+        return values
+
+    def entries(self, name: str) -> List[Dict[str, str]]:
+        """
+        Return the keys of each entry of the name array, without their
+        name[N]. prefix, in index order. Used for the items[N].Key=value
+        lists of the search results.
+
+            ConfigTable("items[0].Type=Login").entries("items")
+            [{'Type': 'Login'}]
+        """
+        prefix = f"{name}["
+        first = len(prefix)
+        entries: Dict[int, Dict[str, str]] = {}
+        for key, value in self.index.items():
+            if not key.startswith(prefix):
+                continue
+            end = key.find("]", first)
+            try:
+                number = int(key[first:end])
+            except ValueError:
+                continue
+            start = end + 2
+            entries.setdefault(number, {})[key[start:]] = value
+        return [entry for _, entry in sorted(entries.items())]
+
+    def values(self, leaf: str) -> List[str]:
+        """Return the values of all keys ending with leaf, in order."""
+        return self._leaves.get(leaf, [])
+
+    @property
+    def tree(self) -> Dict[str, Any]:
+        """Return the values as nested dicts, with lists for indexes."""
+        if self._tree is None:
+            self._tree = {}
+            for key, value in self.index.items():
+                _insert(self._tree, key, value)
+        return self._tree
+
+
+def _insert(tree: Dict[str, Any], key: str, value: str) -> None:
+    parts: List[Any] = [
+        name if name else int(index)
+        for name, index in _REG_KEY_PART.findall(key)
+    ]
+    if not parts:
+        return
+    node: Any = tree
+    for part, next_part in zip(parts, parts[1:]):
+        child = _child(node, part)
+        if not isinstance(child, (dict, list)):
+            child = [] if isinstance(next_part, int) else {}
+            _set_child(node, part, child)
+        node = child
+    _set_child(node, parts[-1], value)
+
+
+def _child(node: Any, part: Any) -> Any:
+    if isinstance(node, list):
+        if isinstance(part, int) and part < len(node):
+            return node[part]
+        return None
+    return node.get(part)
+
+
+def _set_child(node: Any, part: Any, value: Any) -> None:
+    if isinstance(node, list):
+        if not isinstance(part, int):
+            return
+        if part >= len(node):
+            node.extend([None] * (part + 1 - len(node)))
+        node[part] = value
+    elif not isinstance(part, int):
+        node[part] = value
+
+
+@lru_cache(maxsize=32)
+def parse_config(content: str) -> ConfigTable:
+    """
+    Return the parsed response, cached since most getters parse the same
+    config many times. The result is shared, do not modify it.
+    """
+    return ConfigTable(content)
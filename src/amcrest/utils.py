@@ -16,6 +16,8 @@ from typing import List
 # pylint: disable=no-name-in-module
 from typing import List, Tuple, Union
 
+from .table import parse_config
+
 DATEFMT = "%Y-%m-%d %H:%M:%S"
 PRECISION = 2
 
@@ -88,12 +90,12 @@ def to_unit(
 
 def extract_audio_video_enabled(param: str, resp: str) -> List[bool]:
     """Extract if any audio/video stream enabled from response."""
-    parts = [
-        part.rpartition("=")[2] == "true"
-        for part in resp.split()
-        if f".{param}Enable=" in part
+    table = parse_config(resp)
+    return [
+        value == "true"
+        for name in table.arrays()
+        for value in table.column(name, f"{param}Enable")
     ]
-    return parts
 
 
 def enable_audio_video_cmd(
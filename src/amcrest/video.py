@@ -13,6 +13,7 @@ from typing import List
 
 from . import utils
 from .http import Http
+from .table import parse_config
 
 
 class Video(Http):
@@ -123,14 +124,20 @@ class Video(Http):
 
     @video_standard.setter
     def video_standard(self, std: str) -> str:
-        return self._get_config(f"setConfig&VideoStandard={std}")
+        ret = self.command(
+            f"configManager.cgi?action=setConfig&VideoStandard={std}"
+        )
+        return ret.content.decode()
 
     @property
     async def async_video_standard(self) -> str:
         return await self._async_get_config("VideoStandard")
 
     async def async_set_video_standard(self, std: str) -> str:
-        return await self._async_get_config(f"setConfig&VideoStandard={std}")
+        ret = await self.async_command(
+            f"configManager.cgi?action=setConfig&VideoStandard={std}"
+        )
+        return ret.content.decode()
 
     @property
     def video_widget_config(self) -> str:
@@ -188,11 +195,8 @@ class Video(Http):
             field = param
         else:
             field = f"{profile}Options.{param}"
-        return [
-            utils.pretty(opt)
-            for opt in self.video_in_options.split()
-            if f"].{field}=" in opt
-        ]
+        table = parse_config(self.video_in_options)
+        return table.column("VideoInOptions", field)
 
     async def async_video_in_option(
         self, param: str, *, profile: str = "Day"
@@ -208,11 +212,8 @@ class Video(Http):
             field = param
         else:
             field = f"{profile}Options.{param}"
-        return [
-            utils.pretty(opt)
-            for opt in (await self.async_video_in_options).split()
-            if f"].{field}=" in opt
-        ]
+        table = parse_config(await self.async_video_in_options)
+        return table.column("VideoInOptions", field)
 
     def set_video_in_option(
         self, param: str, value: str, *, profile: str = "Day", channel: int = 0
@@ -1,3 +1,8 @@
+import asyncio
+import re
+import threading
+import httpx
+import requests
 import responses
 import amcrest
 from unittest import TestCase
@@ -10,6 +15,11 @@ except ImportError:
     fn_urlencode = urllib.urlencode
 
 
+def get_query(request):
+    return dict(urllib.parse.parse_qsl(
+        urllib.parse.urlsplit(request.url).query))
+
+
 class MockTestCase(TestCase):
     def get_host(self):
         return 'www.example.com'
@@ -46,3 +56,116 @@ class MockTestCase(TestCase):
             self.get_port(),
             'admin',
             'test')
+
+    def add_async_responses(self, camera, handler):
+        """
+        Answer the async commands of a camera from the running event loop
+        with handler(request), which returns an httpx.Response.
+        """
+        loop = asyncio.get_running_loop()
+        camera._async_clients[loop] = httpx.AsyncClient(
+            transport=httpx.MockTransport(handler))
+
+    def add_media_find_responses(self, files, failed=(), timeouts=()):
+        """
+        Answer mediaFileFind.cgi searches with the files of a list of
+        (file_path, start_time, end_time) that overlap the searched range.
+        Searches numbered in failed are answered with an error, and
+        findNextFile requests numbered in timeouts time out.
+
+        Return the list the StartTime of each search is appended to.
+        """
+        searches = []
+        factories = {}
+        pages = []
+        lock = threading.Lock()
+
+        def callback(request):
+            with lock:
+                return answer(get_query(request))
+
+        def answer(params):
+            action = params['action']
+            if action == 'factory.create':
+                factories[str(len(factories) + 1)] = []
+                return (200, {}, 'result={}\r\n'.format(len(factories)))
+            if action == 'findFile':
+                start = params['condition.StartTime']
+                end = params['condition.EndTime']
+                searches.append(start)
+                if len(searches) - 1 in failed:
+                    return (200, {}, 'Error\r\n')
+                factories[params['object']] = [
+                    media_file for media_file in files
+                    if media_file[2] >= start and media_file[1] < end]
+                return (200, {}, 'OK\r\n')
+            if action == 'findNextFile':
+                pages.append(params['count'])
+                if len(pages) - 1 in timeouts:
+                    raise requests.ReadTimeout('timed out')
+                found = factories[params['object']]
+                page = found[:int(params['count'])]
+                del found[:len(page)]
+                lines = ['found={}'.format(len(page))]
+                for i, (file_path, start, end) in enumerate(page):
+                    lines += [
+                        'items[{}].Channel=0'.format(i),
+                        'items[{}].Duration=1800'.format(i),
+                        'items[{}].EndTime={}'.format(i, end),
+                        'items[{}].Events[0]=VideoMotion'.format(i),
+                        'items[{}].FilePath={}'.format(i, file_path),
+                        'items[{}].Length=1000'.format(i),
+                        'items[{}].StartTime={}'.format(i, start),
+                        'items[{}].Type=mp4'.format(i),
+                    ]
+                return (200, {}, '\r\n'.join(lines + ['']))
+            return (200, {}, 'OK\r\n')
+
+        responses.add_callback(
+            responses.GET,
+            re.compile(r'.*/cgi-bin/mediaFileFind\.cgi.*'),
+            callback=callback)
+        return searches
+
+    def add_log_find_responses(self, entries):
+        """
+        Answer log.cgi searches with the entries of a list of
+        (time, type, user) between the searched times.
+
+        Return the list the StartTime of each search is appended to.
+        """
+        searches = []
+        found = {}
+
+        def callback(request):
+            params = get_query(request)
+            action = params['action']
+            if action == 'startFind':
+                start = params['condition.StartTime']
+                end = params['condition.EndTime']
+                searches.append(start)
+                token = str(len(searches))
+                found[token] = [
+                    entry for entry in entries if start <= entry[0] <= end]
+                return (200, {}, 'token={}\r\n'.format(token))
+            if action == 'doFind':
+                remaining = found[params['token']]
+                page = remaining[:int(params['count'])]
+                del remaining[:len(page)]
+                lines = ['found={}'.format(len(page))]
+                for i, (time, type_, user) in enumerate(page):
+                    lines += [
+                        'items[{}].Detail.Address=192.168.1.2'.format(i),
+                        'items[{}].Level=0'.format(i),
+                        'items[{}].Time={}'.format(i, time),
+                        'items[{}].Type={}'.format(i, type_),
+                        'items[{}].User={}'.format(i, user),
+                    ]
+                return (200, {}, '\r\n'.join(lines + ['']))
+            return (200, {}, 'OK\r\n')
+
+        responses.add_callback(
+            responses.GET,
+            re.compile(r'.*/cgi-bin/log\.cgi.*'),
+            callback=callback)
+        return searches
@@ -0,0 +1,21 @@
+"""Test audio.py functions."""
+import asyncio
+
+from .mocktestcase import MockTestCase
+
+
+class TestAudio(MockTestCase):
+    """Tests for audio.py."""
+
+    def test_audio_stream_capture_requires_channel(self):
+        c = self.get_amcrest().camera
+        with self.assertRaises(RuntimeError):
+            c.audio_stream_capture(httptype='singlepart')
+
+        async def capture():
+            async for _ in c.async_audio_stream_capture(
+                    httptype='singlepart'):
+                pass
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(capture())
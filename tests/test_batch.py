@@ -0,0 +1,62 @@
+"""Test batch.py functions."""
+import responses
+
+from .mocktestcase import MockTestCase
+
+
+class TestConfigBatch(MockTestCase):
+    """Tests for batch.py."""
+
+    @responses.activate
+    def test_flush(self):
+        self.add_init_responses()
+        responses.add(
+            responses.GET,
+            self.format_url('configManager.cgi', {
+                'action': 'setConfig',
+                'MotionDetect[0].Enable': 'true',
+                'RecordMode[0].Mode': '1',
+                'NTP.Enable': 'true',
+                'NTP.Port': '123'}),
+            body='OK\r\n',
+            status=200)
+
+        c = self.get_amcrest().camera
+        with c.config_batch() as batch:
+            batch.set_motion_detection(True)
+            batch.set_record_mode(1)
+            batch.set_ntp_config('NTP.Enable=true&NTP.Port=123')
+        self.assertEqual(
+            {'MotionDetect[0].Enable': True,
+             'RecordMode[0].Mode': True,
+             'NTP.Enable': True,
+             'NTP.Port': True},
+            batch.results)
+        self.assertEqual(0, len(batch))
+
+    @responses.activate
+    def test_split(self):
+        self.add_init_responses()
+        responses.add(
+            responses.GET,
+            self.format_url('configManager.cgi', {
+                'action': 'setConfig',
+                'MotionDetect[0].Enable': 'true'}),
+            body='OK\r\n',
+            status=200)
+        responses.add(
+            responses.GET,
+            self.format_url('configManager.cgi', {
+                'action': 'setConfig',
+                'LeLensMask[0].Enable': 'false'}),
+            body='Error\r\n',
+            status=200)
+
+        c = self.get_amcrest().camera
+        batch = c.config_batch(max_url_length=100)
+        batch.set_motion_detection(True)
+        batch.set_privacy(False)
+        self.assertEqual(2, len(batch.commands()))
+        self.assertEqual(
+            {'MotionDetect[0].Enable': True, 'LeLensMask[0].Enable': False},
+            batch.flush())
@@ -0,0 +1,122 @@
+"""Test cache.py functions."""
+import asyncio
+import threading
+import time
+from unittest import TestCase
+
+import responses
+
+import amcrest
+from amcrest.cache import ConfigCache, set_config_names
+
+from .mocktestcase import MockTestCase
+
+
+class TestConfigCache(TestCase):
+    """Tests for cache.py."""
+
+    def test_set_config_names(self):
+        self.assertEqual(
+            {'MotionDetect', 'Telnet'},
+            set_config_names(
+                'configManager.cgi?action=setConfig'
+                '&MotionDetect[0].Enable=true&Telnet.Enable=false'))
+        self.assertEqual(
+            set(),
+            set_config_names(
+                'configManager.cgi?action=getConfig&name=MotionDetect'))
+
+    def test_ttl_per_name(self):
+        cache = ConfigCache({'RTSP': 60})
+        calls = []
+
+        def fetch(name):
+            calls.append(name)
+            return name
+
+        for _ in range(2):
+            cache.get('RTSP', fetch)
+            cache.get('NTP', fetch)
+        self.assertEqual(['RTSP', 'NTP', 'NTP'], calls)
+
+    def test_single_flight(self):
+        cache = ConfigCache(60)
+        calls = []
+
+        def fetch(name):
+            calls.append(name)
+            time.sleep(0.1)
+            return 'table.{}.Enable=true'.format(name)
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(cache.get('Snap', fetch)))
+            for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(['Snap'], calls)
+        self.assertEqual(['table.Snap.Enable=true'] * 5, results)
+
+    def test_async_single_flight(self):
+        cache = ConfigCache(60)
+        calls = []
+
+        async def fetch(name):
+            calls.append(name)
+            await asyncio.sleep(0.1)
+            return 'table.{}.Enable=true'.format(name)
+
+        async def read():
+            return await asyncio.gather(
+                *(cache.async_get('Snap', fetch) for _ in range(5)))
+
+        results = asyncio.run(read())
+        self.assertEqual(['Snap'], calls)
+        self.assertEqual(['table.Snap.Enable=true'] * 5, results)
+
+
+class TestCameraConfigCache(MockTestCase):
+    """Tests for the config cache of a camera."""
+
+    def get_amcrest(self):
+        return amcrest.AmcrestCamera(
+            self.get_host(),
+            self.get_port(),
+            'admin',
+            'test',
+            config_cache_ttl=60)
+
+    @responses.activate
+    def test_invalidate_on_set_config(self):
+        self.add_init_responses()
+        url = self.format_url('configManager.cgi', {
+            'action': 'getConfig',
+            'name': 'MotionDetect'})
+        responses.add(
+            responses.GET,
+            url,
+            body='table.MotionDetect[0].Enable=false\r\n',
+            status=200)
+        responses.add(
+            responses.GET,
+            self.format_url('configManager.cgi', {
+                'action': 'setConfig',
+                'MotionDetect[0].Enable': 'true'}),
+            body='OK\r\n',
+            status=200)
+        responses.add(
+            responses.GET,
+            url,
+            body='table.MotionDetect[0].Enable=true\r\n',
+            status=200)
+
+        c = self.get_amcrest().camera
+        self.assertFalse(c.is_motion_detector_on())
+        self.assertFalse(c.is_motion_detector_on())
+        self.assertTrue(c.set_motion_detection(True))
+        self.assertTrue(c.is_motion_detector_on())
+        self.assertEqual(
+            2, sum(call.request.url == url for call in responses.calls))
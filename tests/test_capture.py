@@ -0,0 +1,89 @@
+"""Test capture.py functions."""
+import asyncio
+import re
+import time
+
+import httpx
+import responses
+
+from .mocktestcase import MockTestCase
+
+
+class TestSnapshotCapture(MockTestCase):
+    """Tests for capture.py."""
+
+    def add_snapshot_responses(self, delay=0.0):
+        def callback(request):
+            time.sleep(delay)
+            return (200, {}, b'jpeg')
+
+        self.add_init_responses()
+        responses.add_callback(
+            responses.GET,
+            re.compile(r'.*/cgi-bin/snapshot\.cgi.*'),
+            callback=callback)
+
+    @responses.activate
+    def test_run(self):
+        self.add_snapshot_responses()
+
+        frames = []
+        c = self.get_amcrest().camera
+        stats = c.capture(20, channel=1).run(frames.append, frames=3)
+        self.assertEqual(3, stats.frames)
+        self.assertEqual([0, 1, 2], [frame.tick for frame in frames])
+        self.assertEqual(b'jpeg', frames[0].data)
+        self.assertTrue(
+            responses.calls[-1].request.url.endswith('snapshot.cgi?channel=1'))
+
+    @responses.activate
+    def test_run_skips_when_behind(self):
+        self.add_snapshot_responses(delay=0.05)
+
+        frames = []
+        c = self.get_amcrest().camera
+        stats = c.capture(100).run(frames.append, frames=4)
+        self.assertEqual(4, stats.frames)
+        self.assertGreater(stats.skipped, 0)
+        self.assertGreater(frames[-1].tick, 3)
+        # Frames are not taken faster than the camera answers.
+        self.assertLess(stats.fps, 25)
+        self.assertGreaterEqual(stats.latency, 0.05)
+
+    def add_async_snapshot_responses(self, camera):
+        def handler(request):
+            if request.url.path.endswith('/snapshot.cgi'):
+                return httpx.Response(200, content=b'jpeg')
+            return httpx.Response(200, text='name=AMCTEST_MACHINE\r\n')
+
+        self.add_async_responses(camera, handler)
+
+    def test_async_run_queue(self):
+        async def run():
+            c = self.get_amcrest().camera
+            self.add_async_snapshot_responses(c)
+            frames = asyncio.Queue(maxsize=2)
+            stats = await c.capture(50).async_run(frames, frames=5)
+            await c.async_close()
+            return stats, [frames.get_nowait().tick for _ in range(2)]
+
+        stats, ticks = asyncio.run(run())
+        self.assertEqual(5, stats.frames)
+        self.assertEqual(3, stats.dropped)
+        self.assertEqual([3, 4], ticks)
+
+    def test_async_run_stop(self):
+        async def run():
+            c = self.get_amcrest().camera
+            self.add_async_snapshot_responses(c)
+            capture = c.capture(0.1)
+            asyncio.get_running_loop().call_later(0.2, capture.stop)
+            stats = await capture.async_run(lambda frame: None)
+            await c.async_close()
+            return stats
+
+        started = time.monotonic()
+        stats = asyncio.run(run())
+        # Stopped without waiting the 10 seconds until the next frame.
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(1, stats.frames)
@@ -0,0 +1,143 @@
+"""Test event.py functions."""
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import responses
+
+import amcrest
+from amcrest.event import _EventParser
+
+from .mocktestcase import MockTestCase
+
+EVENT_STREAM = (
+    b'--myboundary\r\n'
+    b'Content-Type: text/plain\r\n'
+    b'Content-Length: 37\r\n'
+    b'\r\n'
+    b'Code=VideoMotion;action=Start;index=0\r\n'
+    b'--myboundary\r\n'
+    b'Content-Type: text/plain\r\n'
+    b'Content-Length: 56\r\n'
+    b'\r\n'
+    b'Code=CrossLineDetection;action=Stop;index=0;data={"a":1}\r\n'
+)
+
+
+class BlockingEventHandler(BaseHTTPRequestHandler):
+    """Send the first event of EVENT_STREAM, then wait for release."""
+
+    def do_GET(self):
+        if 'eventManager.cgi' not in self.path:
+            body = b'name=AMCTEST_MACHINE\r\n'
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_response(200)
+        self.send_header(
+            'Content-Type', 'multipart/x-mixed-replace; boundary=myboundary')
+        self.end_headers()
+        self.wfile.write(EVENT_STREAM[:EVENT_STREAM.index(b'--', 2)])
+        self.wfile.flush()
+        self.server.release.wait(10)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestEvent(MockTestCase):
+    """Tests for event.py."""
+
+    def test_parser_split_chunks(self):
+        parser = _EventParser()
+        events = []
+        for i in range(len(EVENT_STREAM)):
+            events.extend(parser.feed(EVENT_STREAM[i:i + 1]))
+        self.assertEqual(events, _EventParser().feed(EVENT_STREAM))
+        self.assertEqual(2, len(events))
+        self.assertEqual(
+            'Code=VideoMotion;action=Start;index=0', events[0].strip())
+
+    @responses.activate
+    def test_event_actions(self):
+        self.add_init_responses()
+        responses.add(
+            responses.GET,
+            re.compile(r'.*/cgi-bin/eventManager\.cgi\?action=attach.*'),
+            body=EVENT_STREAM,
+            status=200)
+
+        c = self.get_amcrest().camera
+        events = list(c.event_actions('VideoMotion,CrossLineDetection'))
+        self.assertEqual(
+            [('VideoMotion',
+              {'Code': 'VideoMotion', 'action': 'Start', 'index': '0'}),
+             ('CrossLineDetection',
+              {'Code': 'CrossLineDetection', 'action': 'Stop', 'index': '0',
+               'data': {'a': 1}})],
+            events)
+
+    @responses.activate
+    def test_event_hub(self):
+        self.add_init_responses()
+        responses.add(
+            responses.GET,
+            re.compile(r'.*/cgi-bin/eventManager\.cgi\?action=attach.*'),
+            body=EVENT_STREAM,
+            status=200)
+
+        c = self.get_amcrest().camera
+        motion = c.subscribe_events('VideoMotion')
+        cross = c.subscribe_events('CrossLineDetection', policy='drop_newest')
+        thread = c.event_hub._thread
+        self.assertEqual(
+            'VideoMotion', motion.get(timeout=5)[1]['Code'])
+        self.assertEqual(
+            {'a': 1}, cross.get(timeout=5)[1]['data'])
+        self.assertEqual(
+            frozenset(('VideoMotion', 'CrossLineDetection')),
+            c.event_hub.codes)
+
+        c.close()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertIsNone(motion.get())
+        self.assertEqual([], list(cross))
+
+    def test_event_hub_blocked_stream(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), BlockingEventHandler)
+        server.daemon_threads = True
+        server.release = threading.Event()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            c = amcrest.AmcrestCamera(
+                '127.0.0.1', server.server_address[1], 'admin', 'test').camera
+            first = c.subscribe_events('VideoMotion')
+            second = c.subscribe_events('VideoMotion')
+            self.assertIsNotNone(first.get(timeout=5))
+            self.assertIsNotNone(second.get(timeout=5))
+            thread = c.event_hub._thread
+
+            # The stream stays open for the other subscriber.
+            first.close()
+            thread.join(0.5)
+            self.assertTrue(thread.is_alive())
+
+            # The last subscriber leaving interrupts the blocked read.
+            second.close()
+            thread.join(2)
+            self.assertFalse(thread.is_alive())
+
+            third = c.subscribe_events('VideoMotion')
+            self.assertIsNotNone(third.get(timeout=5))
+            thread = c.event_hub._thread
+            c.close()
+            thread.join(2)
+            self.assertFalse(thread.is_alive())
+            self.assertIsNone(third.get())
+        finally:
+            server.release.set()
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,93 @@
+"""Test fleet.py functions."""
+import asyncio
+import re
+import threading
+import urllib.parse
+from unittest import mock
+
+import httpx
+import requests
+import responses
+
+import amcrest
+from amcrest import CameraFleet, CommError
+
+from .mocktestcase import MockTestCase
+
+
+class TestCameraFleet(MockTestCase):
+    """Tests for fleet.py."""
+
+    def get_cameras(self, *hosts):
+        return [
+            amcrest.AmcrestCamera(
+                host, 80, 'admin', 'test', retries_connection=0).camera
+            for host in hosts]
+
+    def add_magic_box_responses(self, release):
+        """Answer with the host name, except broken and slow cameras."""
+        def callback(request):
+            host = urllib.parse.urlsplit(request.url).hostname
+            if host == 'broken':
+                raise requests.ConnectionError('down')
+            if host == 'slow':
+                release.wait(5)
+            return (200, {}, 'name={}\r\n'.format(host))
+
+        responses.add_callback(
+            responses.GET,
+            re.compile(r'.*/cgi-bin/magicBox\.cgi.*'),
+            callback=callback)
+
+    @responses.activate
+    def test_run(self):
+        release = threading.Event()
+        self.add_magic_box_responses(release)
+        cameras = self.get_cameras('fast', 'broken', 'slow')
+        with mock.patch.object(
+                cameras[0], 'close', wraps=cameras[0].close) as close:
+            with CameraFleet(cameras, timeout=0.2) as fleet:
+                results = {
+                    result.name: result
+                    for result in fleet.run('machine_name')}
+                release.set()
+            close.assert_called_once_with()
+        self.assertEqual('fast', results['fast'].result)
+        self.assertIsInstance(results['broken'].error, CommError)
+        self.assertIsInstance(results['slow'].error, asyncio.TimeoutError)
+
+    @responses.activate
+    def test_run_method(self):
+        self.add_magic_box_responses(threading.Event())
+        fleet = CameraFleet(self.get_cameras('a', 'b'))
+        self.assertEqual(
+            {'name=a\r\n', 'name=b\r\n'},
+            {result.result for result in fleet.run(
+                '_magic_box', 'getMachineName')})
+        fleet.close()
+
+    def test_async_run(self):
+        async def handler(request):
+            host = request.url.host
+            if host == 'broken':
+                raise httpx.ConnectError('down', request=request)
+            if host == 'slow':
+                await asyncio.sleep(5)
+            return httpx.Response(200, text='name={}\r\n'.format(host))
+
+        async def run():
+            cameras = self.get_cameras('fast', 'broken', 'slow')
+            for camera in cameras:
+                self.add_async_responses(camera, handler)
+            async with CameraFleet(cameras, timeout=0.2) as fleet:
+                return [result async for result in fleet.async_run(
+                    'async_machine_name')]
+
+        results = asyncio.run(run())
+        self.assertEqual(
+            ['broken', 'fast', 'slow'],
+            sorted(result.name for result in results))
+        results = {result.name: result for result in results}
+        self.assertEqual('fast', results['fast'].result)
+        self.assertIsInstance(results['broken'].error, CommError)
+        self.assertIsInstance(results['slow'].error, asyncio.TimeoutError)
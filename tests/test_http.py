@@ -0,0 +1,201 @@
+"""Test http.py functions."""
+import asyncio
+import re
+import threading
+
+import responses
+
+from amcrest import CommError
+
+from .mocktestcase import MockTestCase
+
+
+class TestHttp(MockTestCase):
+    """Tests for http.py."""
+
+    @responses.activate
+    def test_session_reused(self):
+        self.add_init_responses()
+
+        c = self.get_amcrest().camera
+        session = c._get_session()
+        c.command('magicBox.cgi?action=getMachineName')
+        c.command('magicBox.cgi?action=getSerialNo')
+        self.assertIs(session, c._get_session())
+
+    @responses.activate
+    def test_context_manager(self):
+        self.add_init_responses()
+
+        with self.get_amcrest() as amcrest:
+            name = amcrest.camera.command(
+                'magicBox.cgi?action=getMachineName')
+            self.assertEqual('name=AMCTEST_MACHINE', name.text)
+
+    def test_async_client_reused(self):
+        async def clients(camera):
+            async with camera:
+                first = camera._get_async_client()
+                second = camera._get_async_client()
+            return first, second
+
+        c = self.get_amcrest().camera
+        first, second = asyncio.run(clients(c))
+        self.assertIs(first, second)
+        self.assertTrue(first.is_closed)
+        self.assertEqual(0, len(c._async_clients))
+
+    def test_async_clients_per_loop(self):
+        async def client(camera):
+            return camera._get_async_client()
+
+        async def close_from_loop(camera):
+            client = camera._get_async_client()
+            camera.close()
+            await asyncio.sleep(0.1)
+            return client
+
+        c = self.get_amcrest().camera
+        loop = asyncio.new_event_loop()
+        try:
+            first = loop.run_until_complete(client(c))
+            # Another loop gets its own client, the first one is kept.
+            second = asyncio.run(client(c))
+            self.assertIsNot(first, second)
+            self.assertFalse(first.is_closed)
+            # close() closes the clients of the loops still open.
+            c.close()
+            self.assertTrue(first.is_closed)
+        finally:
+            loop.close()
+
+        self.assertTrue(asyncio.run(close_from_loop(c)).is_closed)
+
+    @responses.activate
+    def test_digest_challenge_reused(self):
+        challenge = 'Digest realm="Login to AMC", qop="auth", nonce="1234"'
+        counts = []
+
+        def callback(request):
+            auth = request.headers.get('Authorization', '')
+            if not auth.startswith('Digest '):
+                return (401, {'WWW-Authenticate': challenge}, '')
+            counts.append(re.search(r'nc=(\w+)', auth).group(1))
+            return (200, {}, 'name=AMCTEST')
+
+        responses.add_callback(
+            responses.GET,
+            re.compile(r'.*/cgi-bin/magicBox\.cgi.*'),
+            callback=callback)
+
+        c = self.get_amcrest().camera
+        c.command('magicBox.cgi?action=getMachineName')
+        threads = [
+            threading.Thread(
+                target=c.command, args=('magicBox.cgi?action=getSystemInfo',))
+            for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Only the Basic probe got a 401, all digest requests were answered
+        # with the negotiated nonce and an increasing nonce count.
+        self.assertEqual(1, len(responses.calls) - len(counts))
+        self.assertEqual(
+            ['{:08x}'.format(n) for n in range(1, 7)], sorted(counts))
+
+    @responses.activate
+    def test_get_configs(self):
+        self.add_init_responses()
+        responses.add(
+            responses.GET,
+            self.get_root_url() + '/cgi-bin/configManager.cgi'
+            '?action=getConfig&name=NTP&name=RTSP',
+            body='\r\n'.join((
+                'table.NTP.Enable=false',
+                'table.NTP.Port=123',
+                'table.RTSP.Port=554',
+                '')),
+            status=200)
+
+        c = self.get_amcrest().camera
+        configs = c.get_configs(['NTP', 'RTSP'])
+        self.assertEqual(
+            {'NTP': 'table.NTP.Enable=false\r\ntable.NTP.Port=123\r\n',
+             'RTSP': 'table.RTSP.Port=554\r\n'},
+            configs)
+        self.assertTrue(c._multi_get_config)
+
+    @responses.activate
+    def test_get_configs_fallback(self):
+        self.add_init_responses()
+        for name in ('NTP', 'RTSP'):
+            responses.add(
+                responses.GET,
+                self.format_url('configManager.cgi', {
+                    'action': 'getConfig',
+                    'name': name}),
+                body='table.{}.Port=1\r\n'.format(name),
+                status=200)
+        responses.add(
+            responses.GET,
+            self.get_root_url() + '/cgi-bin/configManager.cgi'
+            '?action=getConfig&name=NTP&name=RTSP',
+            body='Error\r\nBad Request!\r\n',
+            status=400)
+
+        c = self.get_amcrest().camera
+        configs = c.get_configs(['NTP', 'RTSP'])
+        self.assertEqual(
+            {'NTP': 'table.NTP.Port=1\r\n', 'RTSP': 'table.RTSP.Port=1\r\n'},
+            configs)
+        self.assertFalse(c._multi_get_config)
+
+    @responses.activate
+    def test_get_configs_transient_error(self):
+        self.add_init_responses()
+        for name in ('NTP', 'RTSP'):
+            responses.add(
+                responses.GET,
+                self.format_url('configManager.cgi', {
+                    'action': 'getConfig',
+                    'name': name}),
+                body='table.{}.Port=1\r\n'.format(name),
+                status=200)
+        responses.add(
+            responses.GET,
+            self.get_root_url() + '/cgi-bin/configManager.cgi'
+            '?action=getConfig&name=NTP&name=RTSP',
+            status=503)
+
+        c = self.get_amcrest().camera
+        configs = c.get_configs(['NTP', 'RTSP'])
+        self.assertEqual(
+            {'NTP': 'table.NTP.Port=1\r\n', 'RTSP': 'table.RTSP.Port=1\r\n'},
+            configs)
+        # The next call tries the combined request again.
+        self.assertIsNone(c._multi_get_config)
+
+    @responses.activate
+    def test_get_configs_unknown_name(self):
+        self.add_init_responses()
+        responses.add(
+            responses.GET,
+            self.format_url('configManager.cgi', {
+                'action': 'getConfig',
+                'name': 'Unknown'}),
+            body='Error\r\nBad Request!\r\n',
+            status=400)
+        responses.add(
+            responses.GET,
+            self.get_root_url() + '/cgi-bin/configManager.cgi'
+            '?action=getConfig&name=Unknown&name=NTP',
+            body='table.NTP.Port=123\r\n',
+            status=200)
+
+        c = self.get_amcrest().camera
+        with self.assertRaises(CommError):
+            c.get_configs(['Unknown', 'NTP'])
+        # Only the unknown name was missing from the combined response.
+        self.assertIsNone(c._multi_get_config)
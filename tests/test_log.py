@@ -1,6 +1,10 @@
 """Test log.py functions."""
+import asyncio
 import responses
 import datetime
+from unittest import mock
+
+from amcrest.log import LogRecord
 
 from .mocktestcase import MockTestCase
 
@@ -70,3 +74,97 @@ class TestLog(MockTestCase):
         time_end = datetime.datetime(2020, 1, 3, 22, 5, 33)
         logs = list(c.log_find(time_start, time_end))
         self.assertEqual(2, len(logs))
+
+    def test_async_log_find_records(self):
+        c = self.get_amcrest().camera
+        pages = [
+            '\r\n'.join((
+                'found=2',
+                'items[0].Detail.Address=192.168.1.2',
+                'items[0].Level=0',
+                'items[0].Time=2020-01-02 22:05:33',
+                'items[0].Type=Login',
+                'items[0].User=admin',
+                'items[1].Time=2020-01-02 22:06:33',
+                'items[1].Type=Logout',
+                'items[1].User=admin',
+                '')),
+            'found=0\r\n']
+
+        stopped = []
+
+        async def find_start(start_time, end_time):
+            return 'token=17\r\n'
+
+        async def find_next(token, count=100, retries=None):
+            return pages.pop(0)
+
+        async def find_stop(token):
+            stopped.append(token)
+            return 'OK\r\n'
+
+        async def find():
+            return [record async for record in c.async_log_find(
+                datetime.datetime(2020, 1, 2),
+                datetime.datetime(2020, 1, 3),
+                records=True)]
+
+        with mock.patch.object(c, 'async_log_find_start', find_start), \
+                mock.patch.object(c, 'async_log_find_next', find_next), \
+                mock.patch.object(c, 'async_log_find_stop', find_stop):
+            records = asyncio.run(find())
+
+        self.assertEqual([
+            LogRecord(
+                time=datetime.datetime(2020, 1, 2, 22, 5, 33),
+                type='Login',
+                user='admin',
+                level=0,
+                detail={'Address': '192.168.1.2'}),
+            LogRecord(
+                time=datetime.datetime(2020, 1, 2, 22, 6, 33),
+                type='Logout',
+                user='admin',
+                level=0,
+                detail={})], records)
+        self.assertEqual(['17'], stopped)
+
+    @responses.activate
+    def test_log_find_page_growth(self):
+        self.add_init_responses()
+
+        responses.add(
+            responses.GET,
+            self.format_url('log.cgi', {
+                'action': 'startFind',
+                'condition.StartTime': '2020-01-02 21:05:33',
+                'condition.EndTime': '2020-01-03 22:05:33'}),
+            body='token=17\r\n',
+            status=200)
+
+        for count, found in ((10, 10), (20, 20), (40, 5), (40, 0)):
+            responses.add(
+                responses.GET,
+                self.format_url('log.cgi', {
+                    'action': 'doFind',
+                    'token': 17,
+                    'count': count}),
+                body='found={}\r\n'.format(found),
+                status=200)
+
+        responses.add(
+            responses.GET,
+            self.format_url('log.cgi', {
+                'action': 'stopFind',
+                'token': 17}),
+            body='OK\r\n',
+            status=200)
+
+        c = self.get_amcrest().camera
+
+        time_start = datetime.datetime(2020, 1, 2, 21, 5, 33)
+        time_end = datetime.datetime(2020, 1, 3, 22, 5, 33)
+        logs = list(c.log_find(time_start, time_end, count=10, max_count=40))
+        self.assertEqual(
+            ['found=10\r\n', 'found=20\r\n', 'found=5\r\n', 'found=0\r\n'],
+            logs)
@@ -0,0 +1,73 @@
+"""Test log_index.py functions."""
+from datetime import datetime
+
+import responses
+
+from amcrest.log import LogRecord
+from amcrest.log_index import LogIndex
+
+from .mocktestcase import MockTestCase
+
+
+class TestLogIndex(MockTestCase):
+    """Tests for log_index.py."""
+
+    @responses.activate
+    def test_sync(self):
+        self.add_init_responses()
+        entries = [
+            ('2020-01-02 22:05:33', 'Login', 'admin'),
+            ('2020-01-02 22:06:33', 'Logout', 'admin')]
+        searches = self.add_log_find_responses(entries)
+
+        c = self.get_amcrest().camera
+        end = datetime(2020, 1, 3)
+        with LogIndex() as index:
+            self.assertEqual(2, index.sync(c, 'door', end_time=end))
+
+            # The last entry is found again by the next sync.
+            entries.append(('2020-01-02 22:07:33', 'Login', 'guest'))
+            self.assertEqual(1, index.sync(c, 'door', end_time=end))
+            self.assertEqual('2020-01-02 22:06:33', searches[1])
+
+            self.assertEqual(
+                [LogRecord(
+                    time=datetime(2020, 1, 2, 22, 5, 33),
+                    type='Login',
+                    user='admin',
+                    level=0,
+                    detail={'Address': '192.168.1.2'}),
+                 LogRecord(
+                    time=datetime(2020, 1, 2, 22, 7, 33),
+                    type='Login',
+                    user='guest',
+                    level=0,
+                    detail={'Address': '192.168.1.2'})],
+                index.records('door', type='Login'))
+            self.assertEqual(
+                ['Login', 'Logout'],
+                [record.type for record in index.records(
+                    'door', user='admin')])
+            self.assertEqual(
+                [], index.records(
+                    'door', start_time=datetime(2020, 1, 2, 22, 8)))
+
+    @responses.activate
+    def test_sync_same_second(self):
+        self.add_init_responses()
+        entries = [
+            ('2020-01-02 22:05:33', 'Login', 'admin'),
+            ('2020-01-02 22:05:33', 'Login', 'admin')]
+        self.add_log_find_responses(entries)
+
+        c = self.get_amcrest().camera
+        end = datetime(2020, 1, 3)
+        with LogIndex() as index:
+            self.assertEqual(2, index.sync(c, 'door', end_time=end))
+
+            # A third entry of the same second is logged after the sync.
+            entries.append(('2020-01-02 22:05:33', 'Login', 'admin'))
+            self.assertEqual(1, index.sync(c, 'door', end_time=end))
+            self.assertEqual(3, len(index.records('door')))
+            self.assertEqual(0, index.sync(c, 'door', end_time=end))
+            self.assertEqual(3, len(index.records('door')))
@@ -1,8 +1,19 @@
-"""Test log.py functions."""
-import responses
+"""Test media.py functions."""
+import asyncio
+import contextlib
 import datetime
+import os
+import re
+import tempfile
+from unittest import mock
+
+import httpx
+import responses
 
-from .mocktestcase import MockTestCase
+import amcrest
+from amcrest.media import MediaFile, parse_media_files
+
+from .mocktestcase import MockTestCase, get_query
 
 
 class TestMedia(MockTestCase):
@@ -23,6 +34,83 @@ class TestMedia(MockTestCase):
         content = c.download_file('/mnt/sd/test.dat').decode('utf-8')
         self.assertEqual(body, content)
 
+    @responses.activate
+    def test_download_file_to_resume(self):
+        self.add_init_responses()
+
+        body = b'0123456789' * 10
+        ranges = []
+
+        def callback(request):
+            ranges.append(request.headers.get('Range'))
+            start = int(request.headers['Range'][6:-1])
+            return (206, {
+                'Content-Range': 'bytes {}-{}/{}'.format(
+                    start, len(body) - 1, len(body))}, body[start:])
+
+        responses.add_callback(
+            responses.GET,
+            self.format_url('RPC_Loadfile//mnt/sd/test.dav'),
+            callback=callback)
+
+        progress = []
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'test.dav')
+            with open(path, 'wb') as partial:
+                partial.write(body[:40])
+            c = self.get_amcrest().camera
+            size = c.download_file_to(
+                '/mnt/sd/test.dav', path, chunk_size=16,
+                progress=lambda done, total: progress.append((done, total)))
+            with open(path, 'rb') as downloaded:
+                self.assertEqual(body, downloaded.read())
+        self.assertEqual(100, size)
+        self.assertEqual(['bytes=40-'], ranges)
+        self.assertEqual((56, 100), progress[0])
+        self.assertEqual((100, 100), progress[-1])
+
+    def test_async_download_file_to_restart(self):
+        body = b'0123456789' * 10
+        headers = []
+
+        @contextlib.asynccontextmanager
+        async def stream_command(cmd, **kwargs):
+            headers.append(kwargs['headers'])
+            yield httpx.Response(200, content=body)
+
+        async def download(c, path):
+            with mock.patch.object(
+                    c, 'async_stream_command', stream_command):
+                return await c.async_download_file_to(
+                    '/mnt/sd/test.dav', path, chunk_size=16)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'test.dav')
+            with open(path, 'wb') as partial:
+                partial.write(b'x' * 40)
+            c = self.get_amcrest().camera
+            size = asyncio.run(download(c, path))
+            with open(path, 'rb') as downloaded:
+                self.assertEqual(body, downloaded.read())
+        self.assertEqual(100, size)
+        # The camera ignored the range and sent the whole file.
+        self.assertEqual([{'Range': 'bytes=40-'}], headers)
+
+    @responses.activate
+    def test_download_file_to_short(self):
+        self.add_init_responses()
+        responses.add(
+            responses.GET,
+            self.format_url('RPC_Loadfile//mnt/sd/test.dav'),
+            body=b'0123',
+            headers={'Content-Range': 'bytes 0-9/10'},
+            status=200)
+
+        c = self.get_amcrest().camera
+        with tempfile.TemporaryFile() as dest:
+            with self.assertRaises(amcrest.CommError):
+                c.download_file_to('/mnt/sd/test.dav', dest)
+
     @responses.activate
     def test_log_find(self):
         self.add_init_responses()
@@ -173,3 +261,187 @@ ErrorID=2, Detail=Invalid Request!
         time_end = datetime.datetime(2020, 1, 2, 3, 4, 10)
         media = list(c.find_files(time_start, time_end))
         self.assertEqual(2, len(media))
+
+    def test_parse_media_files(self):
+        files = parse_media_files('\r\n'.join((
+            'found=2',
+            'items[0].Channel=0',
+            'items[0].EndTime=2020-01-06 06:13:00',
+            'items[0].Events[0]=VideoMotion',
+            'items[0].Events[1]=SmartMotionHuman',
+            'items[0].FilePath=/mnt/sd/2020-01-06/001/dav/06/a.mp4',
+            'items[0].Flags[0]=Event',
+            'items[0].Length=248362892',
+            'items[0].StartTime=2020-01-06 06:05:00',
+            'items[0].Type=mp4',
+            'items[1].EndTime=2020-01-06 06:21:00',
+            'items[1].FilePath=/mnt/sd/2020-01-06/001/dav/06/b.mp4',
+            'items[1].StartTime=2020-01-06 06:13:00',
+            '')))
+        self.assertEqual(
+            MediaFile(
+                channel=0,
+                file_path='/mnt/sd/2020-01-06/001/dav/06/a.mp4',
+                start_time=datetime.datetime(2020, 1, 6, 6, 5),
+                end_time=datetime.datetime(2020, 1, 6, 6, 13),
+                length=248362892,
+                duration=0,
+                type='mp4',
+                events=('VideoMotion', 'SmartMotionHuman'),
+                flags=('Event',)),
+            files[0])
+        self.assertEqual(
+            datetime.datetime(2020, 1, 6, 6, 21), files[1].end_time)
+        self.assertEqual((), files[1].events)
+
+    @responses.activate
+    def test_export_files(self):
+        self.add_init_responses()
+        responses.add(
+            responses.GET,
+            self.format_url('mediaFileFind.cgi', {
+                'action': 'factory.create'}),
+            body='result=123\r\n',
+            status=200)
+        for name in ('close', 'destroy'):
+            responses.add(
+                responses.GET,
+                self.format_url('mediaFileFind.cgi', {
+                    'action': 'factory.' + name,
+                    'object': 123}),
+                body='OK\r\n',
+                status=200)
+        responses.add(
+            responses.GET,
+            re.compile(r'.*action=findFile&.*'),
+            body='OK\r\n',
+            status=200)
+        for _ in range(2):
+            for body in (
+                    'found=2\r\n'
+                    'items[0].EndTime=2020-01-06 00:10:00\r\n'
+                    'items[0].FilePath=/mnt/sd/2020-01-06/a.mp4\r\n'
+                    'items[0].StartTime=2020-01-06 00:00:00\r\n'
+                    'items[1].EndTime=2020-01-07 00:10:00\r\n'
+                    'items[1].FilePath=/mnt/sd/2020-01-07/b.mp4\r\n'
+                    'items[1].StartTime=2020-01-07 00:00:00\r\n',
+                    'found=0\r\n'):
+                responses.add(
+                    responses.GET,
+                    self.format_url('mediaFileFind.cgi', {
+                        'action': 'findNextFile',
+                        'object': 123,
+                        'count': 100}),
+                    body=body,
+                    status=200)
+        for name in ('2020-01-06/a.mp4', '2020-01-07/b.mp4'):
+            responses.add(
+                responses.GET,
+                self.format_url('RPC_Loadfile//mnt/sd/' + name),
+                body=name.encode(),
+                status=200)
+
+        c = self.get_amcrest().camera
+        time_start = datetime.datetime(2020, 1, 6)
+        time_end = datetime.datetime(2020, 1, 8)
+        with tempfile.TemporaryDirectory() as tmp:
+            stats = c.export_files(
+                time_start, time_end, tmp,
+                layout=lambda path: path.split('/')[-1])
+            self.assertEqual((2, 0, 0, 32), stats[:4])
+            with open(os.path.join(tmp, 'b.mp4'), 'rb') as exported:
+                self.assertEqual(b'2020-01-07/b.mp4', exported.read())
+
+            stats = c.export_files(
+                time_start, time_end, tmp,
+                layout=lambda path: path.split('/')[-1])
+            self.assertEqual((0, 2, 0, 0), stats[:4])
+
+    @responses.activate
+    def test_export_files_error(self):
+        self.add_init_responses()
+        self.add_media_find_responses([(
+            '/mnt/sd/2020-01-06/a.mp4',
+            '2020-01-06 00:00:00',
+            '2020-01-06 00:10:00')])
+        responses.add(
+            responses.GET,
+            self.format_url('RPC_Loadfile//mnt/sd/2020-01-06/a.mp4'),
+            body=b'a',
+            status=200)
+
+        def progress(stats):
+            raise ValueError('progress failed')
+
+        c = self.get_amcrest().camera
+        with tempfile.TemporaryDirectory() as tmp:
+            with self.assertRaises(ValueError):
+                c.export_files(
+                    datetime.datetime(2020, 1, 6),
+                    datetime.datetime(2020, 1, 7),
+                    tmp,
+                    progress=progress)
+
+    @responses.activate
+    def test_find_files_pages(self):
+        self.add_init_responses()
+        files = [
+            ('/mnt/sd/{}.mp4'.format(i),
+             '2020-01-06 0{}:00:00'.format(i),
+             '2020-01-06 0{}:30:00'.format(i))
+            for i in range(5)]
+        self.add_media_find_responses(files)
+
+        c = self.get_amcrest().camera
+        pages = list(c.find_files(
+            datetime.datetime(2020, 1, 6), datetime.datetime(2020, 1, 7),
+            count=2))
+        self.assertEqual(
+            ['found=2', 'found=2', 'found=1'],
+            [content.split('\r\n', 1)[0] for content in pages])
+        self.assertEqual(
+            [file_path for file_path, _, _ in files],
+            [media_file.file_path
+             for content in pages
+             for media_file in parse_media_files(content)])
+
+    @responses.activate
+    def test_find_files_page_timeout(self):
+        self.add_init_responses()
+        files = [
+            ('/mnt/sd/{}.mp4'.format(i),
+             '2020-01-06 0{}:00:00'.format(i),
+             '2020-01-06 0{}:30:00'.format(i))
+            for i in range(5)]
+        self.add_media_find_responses(files, timeouts=(0,))
+
+        c = self.get_amcrest().camera
+        found = c.find_files(
+            datetime.datetime(2020, 1, 6), datetime.datetime(2020, 1, 7),
+            records=True, count=40)
+        self.assertEqual(
+            [file_path for file_path, _, _ in files],
+            [media_file.file_path for media_file in found])
+        # The page timed out once, without retrying the same size, and grew
+        # back once answered quickly.
+        self.assertEqual(
+            ['40', '20', '40'],
+            [get_query(call.request)['count']
+             for call in responses.calls
+             if 'findNextFile' in call.request.url])
+
+    @responses.activate
+    def test_find_files_sharded(self):
+        self.add_init_responses()
+        self.add_media_find_responses([
+            ('/mnt/sd/a.mp4', '2020-01-06 05:50:00', '2020-01-06 06:00:00'),
+            ('/mnt/sd/b.mp4', '2020-01-06 11:55:00', '2020-01-06 12:05:00'),
+            ('/mnt/sd/c.mp4', '2020-01-06 17:50:00', '2020-01-06 18:00:00')])
+
+        c = self.get_amcrest().camera
+        files = c.find_files(
+            datetime.datetime(2020, 1, 6), datetime.datetime(2020, 1, 7),
+            records=True, shards=2)
+        self.assertEqual(
+            ['/mnt/sd/a.mp4', '/mnt/sd/b.mp4', '/mnt/sd/c.mp4'],
+            [media_file.file_path for media_file in files])
@@ -0,0 +1,81 @@
+"""Test media_index.py functions."""
+from datetime import datetime
+
+import responses
+
+from amcrest.media import MediaFile
+from amcrest.media_index import RecordingIndex
+
+from .mocktestcase import MockTestCase, get_query
+
+
+def media_file(name, start_hour):
+    return (
+        '/mnt/sd/{}.mp4'.format(name),
+        '2020-01-06 {:02}:00:00'.format(start_hour),
+        '2020-01-06 {:02}:30:00'.format(start_hour))
+
+
+class TestRecordingIndex(MockTestCase):
+    """Tests for media_index.py."""
+
+    @responses.activate
+    def test_refresh(self):
+        self.add_init_responses()
+        files = [media_file('a', 1), media_file('b', 2)]
+        searches = self.add_media_find_responses(files)
+
+        c = self.get_amcrest().camera
+        end = datetime(2020, 1, 7)
+        with RecordingIndex() as index:
+            self.assertEqual(2, index.refresh(c, 'door', end_time=end))
+
+            files[:] = [media_file('b', 2), media_file('c', 3)]
+            self.assertEqual(2, index.refresh(c, 'door', end_time=end))
+            # The second search started at the end of the last file.
+            self.assertEqual('2020-01-06 02:30:00', searches[1])
+
+            indexed = index.files(
+                'door', datetime(2020, 1, 6), datetime(2020, 1, 7))
+            self.assertEqual(
+                ['/mnt/sd/b.mp4', '/mnt/sd/c.mp4'],
+                [media_file.file_path for media_file in indexed])
+            self.assertEqual(
+                MediaFile(
+                    channel=0,
+                    file_path='/mnt/sd/c.mp4',
+                    start_time=datetime(2020, 1, 6, 3),
+                    end_time=datetime(2020, 1, 6, 3, 30),
+                    length=1000,
+                    duration=1800,
+                    type='mp4',
+                    events=('VideoMotion',),
+                    flags=()),
+                indexed[1])
+            self.assertEqual(
+                [], index.files(
+                    'door', datetime(2020, 1, 6, 4), datetime(2020, 1, 7)))
+
+        # Every search released its factory, also the one stopped early to
+        # find the oldest file.
+        actions = [
+            get_query(call.request)['action'] for call in responses.calls
+            if 'mediaFileFind' in call.request.url]
+        self.assertEqual(
+            actions.count('factory.create'), actions.count('factory.destroy'))
+
+    @responses.activate
+    def test_refresh_search_error(self):
+        self.add_init_responses()
+        files = [media_file('a', 1), media_file('b', 2)]
+        self.add_media_find_responses(files, failed=(1, 2))
+
+        c = self.get_amcrest().camera
+        end = datetime(2020, 1, 7)
+        with RecordingIndex() as index:
+            self.assertEqual(2, index.refresh(c, 'door', end_time=end))
+            # The searches of the second refresh fail, nothing is pruned.
+            self.assertEqual(0, index.refresh(c, 'door', end_time=end))
+            self.assertEqual(
+                2, len(index.files(
+                    'door', datetime(2020, 1, 6), datetime(2020, 1, 7))))
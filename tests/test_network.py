@@ -0,0 +1,40 @@
+"""Test network.py functions."""
+import asyncio
+from unittest import mock
+
+from amcrest.network import Network
+
+from .mocktestcase import MockTestCase
+
+
+class TestNetwork(MockTestCase):
+    """Tests for network.py."""
+
+    def test_async_scan_devices(self):
+        async def scan(camera):
+            async def accept(reader, writer):
+                writer.close()
+
+            servers = [
+                await asyncio.start_server(accept, '127.0.0.1', 0)
+                for _ in range(2)]
+            ports = [
+                server.sockets[0].getsockname()[1] for server in servers]
+            try:
+                with mock.patch.object(
+                        Network, '_Network__RTSP_PORT', ports[0]), \
+                        mock.patch.object(
+                            Network, '_Network__PWGPSI_PORT', ports[1]):
+                    return [ip async for ip in camera.async_scan_devices(
+                        '127.0.0.0/30', concurrency=1)]
+            finally:
+                for server in servers:
+                    server.close()
+
+        c = self.get_amcrest().camera
+        self.assertEqual(['127.0.0.1'], asyncio.run(scan(c)))
+
+    def test_scan_devices_bad_subnet(self):
+        c = self.get_amcrest().camera
+        with self.assertRaises(RuntimeError):
+            c.scan_devices('192.168.1.0/33')
@@ -0,0 +1,27 @@
+"""Test snapshot.py functions."""
+import responses
+
+from .mocktestcase import MockTestCase
+
+
+class TestSnapshot(MockTestCase):
+    """Tests for snapshot.py."""
+
+    @responses.activate
+    def test_snapshot_into(self):
+        self.add_init_responses()
+        responses.add(
+            responses.GET,
+            self.format_url('snapshot.cgi'),
+            body=b'jpeg',
+            status=200)
+
+        c = self.get_amcrest().camera
+        buffer = bytearray(8)
+        self.assertEqual(4, c.snapshot_into(buffer))
+        self.assertEqual(b'jpeg', bytes(buffer[:4]))
+        self.assertEqual(4, c.snapshot_into(memoryview(buffer)[4:]))
+        self.assertEqual(b'jpegjpeg', bytes(buffer))
+
+        with self.assertRaises(ValueError):
+            c.snapshot_into(bytearray(2))
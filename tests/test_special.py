@@ -0,0 +1,129 @@
+"""Test special.py functions."""
+import asyncio
+import os
+import tempfile
+from contextlib import asynccontextmanager
+from unittest import mock
+
+import responses
+
+from amcrest.multipart import MJPEGParser
+from amcrest.recorder import SegmentWriter
+
+from .mocktestcase import MockTestCase
+
+
+def mjpg_part(data):
+    return b''.join((
+        b'--myboundary\r\n',
+        b'Content-Type: image/jpeg\r\n',
+        b'Content-Length: ' + str(len(data)).encode() + b'\r\n',
+        b'\r\n',
+        data,
+        b'\r\n'))
+
+
+MJPG_STREAM = b''.join(
+    mjpg_part(b'\xff\xd8frame\r\n' + str(n).encode() + b'\xff\xd9')
+    for n in range(5))
+
+
+class TestSpecial(MockTestCase):
+    """Tests for special.py."""
+
+    @responses.activate
+    def test_mjpg_frames(self):
+        self.add_init_responses()
+        responses.add(
+            responses.GET,
+            self.format_url('mjpg/video.cgi', {'channel': 1, 'subtype': 1}),
+            body=MJPG_STREAM,
+            content_type='multipart/x-mixed-replace; boundary=myboundary',
+            status=200)
+
+        c = self.get_amcrest().camera
+        frames = list(c.mjpg_frames(typeno=1, every=2))
+        self.assertEqual([0, 2, 4], [frame.number for frame in frames])
+        self.assertEqual(b'\xff\xd8frame\r\n2\xff\xd9', frames[1].data)
+
+    def test_mjpeg_parser_split(self):
+        parser = MJPEGParser()
+        frames = []
+        for n in range(len(MJPG_STREAM)):
+            frames += parser.feed(MJPG_STREAM[n:n + 1])
+        self.assertEqual(5, len(frames))
+        self.assertEqual(b'\xff\xd8frame\r\n4\xff\xd9', frames[4].data)
+
+    def test_mjpeg_parser_max_fps(self):
+        parser = MJPEGParser(max_fps=1)
+        frames = parser.feed(MJPG_STREAM)
+        self.assertEqual([0], [frame.number for frame in frames])
+
+    @responses.activate
+    def test_record_realtime_stream(self):
+        self.add_init_responses()
+        responses.add(
+            responses.GET,
+            self.format_url('realmonitor.cgi', {
+                'action': 'getStream', 'channel': 1, 'subtype': 0}),
+            body=b'0123456789',
+            status=200)
+
+        c = self.get_amcrest().camera
+        done = []
+        with tempfile.TemporaryDirectory() as root:
+            paths = c.record_realtime_stream(
+                os.path.join(root, 'door', '{index}.dav'),
+                segment_bytes=4,
+                on_segment=done.append)
+            self.assertEqual(
+                [os.path.join(root, 'door', name)
+                 for name in ('0.dav', '1.dav', '2.dav')],
+                paths)
+            self.assertEqual(paths, done)
+            contents = []
+            for path in paths:
+                with open(path, 'rb') as segment:
+                    contents.append(segment.read())
+        self.assertEqual([b'0123', b'4567', b'89'], contents)
+
+    def test_segment_writer_paths(self):
+        with self.assertRaises(ValueError):
+            SegmentWriter('{start:%Y%m%d-%H%M%S}.dav', segment_bytes=4)
+
+        with tempfile.TemporaryDirectory() as root:
+            pattern = os.path.join(root, '{index}.dav')
+            with SegmentWriter(pattern) as writer:
+                writer.write(b'0123')
+            # A second recording does not overwrite the first one.
+            with self.assertRaises(FileExistsError):
+                SegmentWriter(pattern).write(b'4567')
+            with open(writer.paths[0], 'rb') as segment:
+                self.assertEqual(b'0123', segment.read())
+
+    def test_async_realtime_stream(self):
+        commands = []
+
+        class Response:
+            async def aiter_bytes(self, chunk_size=None):
+                for chunk in (b'0123', b'4567', b'89'):
+                    yield chunk
+
+        @asynccontextmanager
+        async def stream_command(cmd, timeout_cmd=None):
+            commands.append(cmd)
+            yield Response()
+
+        async def read(camera):
+            chunks = []
+            async for chunk in camera.async_realtime_stream(typeno=1):
+                chunks.append(chunk)
+            return chunks
+
+        c = self.get_amcrest().camera
+        with mock.patch.object(c, 'async_stream_command', stream_command):
+            chunks = asyncio.run(read(c))
+        self.assertEqual([b'0123', b'4567', b'89'], chunks)
+        self.assertEqual(
+            ['realmonitor.cgi?action=getStream&channel=1&subtype=1'],
+            commands)
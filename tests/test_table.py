@@ -0,0 +1,78 @@
+"""Test table.py functions."""
+from unittest import TestCase
+
+from amcrest.table import ConfigTable
+from amcrest.utils import extract_audio_video_enabled
+
+MOTION_DETECT = '\r\n'.join((
+    'table.MotionDetect[0].Enable=true',
+    'table.MotionDetect[0].EventHandler.RecordEnable=false',
+    'table.MotionDetect[0].EventHandler.TimeSection[0][1]=1 00:00:00-23:59:59',
+    'table.MotionDetect[1].Enable=false',
+    'table.MotionDetect[1].EventHandler.RecordEnable=true',
+    ''))
+
+
+class TestConfigTable(TestCase):
+    """Tests for table.py."""
+
+    def test_index(self):
+        table = ConfigTable(MOTION_DETECT)
+        self.assertEqual('true', table.get('MotionDetect[0].Enable'))
+        self.assertEqual(
+            '1 00:00:00-23:59:59',
+            table['MotionDetect[0].EventHandler.TimeSection[0][1]'])
+        self.assertIsNone(table.get('MotionDetect[2].Enable'))
+        self.assertEqual(['MotionDetect'], table.arrays())
+
+    def test_column(self):
+        table = ConfigTable(MOTION_DETECT)
+        self.assertEqual(
+            ['true', 'false'], table.column('MotionDetect', 'Enable'))
+        self.assertEqual(
+            ['false', 'true'],
+            table.column('MotionDetect', 'EventHandler.RecordEnable'))
+        self.assertEqual([], table.column('Record', 'Enable'))
+
+    def test_tree(self):
+        tree = ConfigTable(MOTION_DETECT).tree
+        self.assertEqual('false', tree['MotionDetect'][1]['Enable'])
+        self.assertEqual(
+            [None, '1 00:00:00-23:59:59'],
+            tree['MotionDetect'][0]['EventHandler']['TimeSection'][0])
+
+    def test_entries(self):
+        table = ConfigTable('\r\n'.join((
+            'found=2',
+            'items[1].Type=Logout',
+            'items[0].Events[0]=VideoMotion',
+            'items[0].Type=Login',
+            '')))
+        self.assertEqual(
+            [{'Events[0]': 'VideoMotion', 'Type': 'Login'},
+             {'Type': 'Logout'}],
+            table.entries('items'))
+        self.assertEqual([], table.entries('MotionDetect'))
+
+    def test_values(self):
+        table = ConfigTable('\r\n'.join((
+            'list.info[0].Detail[0].TotalBytes=1024.000000',
+            'list.info[0].Detail[0].UsedBytes=512.000000',
+            'list.info[0].Detail[1].UsedBytes=256.000000',
+            '')))
+        self.assertEqual(
+            ['512.000000', '256.000000'], table.values('UsedBytes'))
+
+    def test_extract_audio_video_enabled(self):
+        encode = '\r\n'.join((
+            'table.Encode[0].MainFormat[0].AudioEnable=false',
+            'table.Encode[0].MainFormat[0].VideoEnable=true',
+            'table.Encode[0].MainFormat[1].VideoEnable=false',
+            'table.Encode[1].MainFormat[0].VideoEnable=false',
+            ''))
+        self.assertEqual(
+            [True, False],
+            extract_audio_video_enabled('MainFormat[0].Video', encode))
+        self.assertEqual(
+            [False],
+            extract_audio_video_enabled('MainFormat[0].Audio', encode))